@@ -0,0 +1,335 @@
+# ------------------------------------------------------------------
+# 대시보드 분석 엔진 (Streamlit 비의존, 벡터화 연산)
+# ------------------------------------------------------------------
+import hashlib
+import html
+import json
+
+import numpy as np
+import pandas as pd
+
+from normalize import concat_prices
+
+# 글로벌 주요 채널 (엠버 글로벌 가격 지수 산출용)
+MAJOR_CHANNELS = ['아고다', '트립닷컴']
+
+# 사전 집계(rollup) 테이블 키 - 사이드바 필터 컬럼(날짜/호텔/판매처/엠버 객실코드)을 모두 포함해야
+# 원본 행과 동일한 필터 결과를 얻음 (엠버여부는 호텔명에 종속이라 그룹 수를 늘리지 않음)
+# (리드타임 집계에도 수집일을 두어 보존 기간이 지난 수집분을 원본 프레임과 같은 기준으로 삭제)
+LEAD_TIME_KEYS = ['호텔명', '엠버여부', '날짜', '판매처', '객실코드', '수집일', '리드타임']
+COLLECTION_KEYS = ['호텔명', '엠버여부', '날짜', '판매처', '객실코드', '수집일']
+
+# 같은 투숙일/객실 내 최고가(공식가) 대비 이 금액 초과로 싸면 파리티 붕괴
+PARITY_TOLERANCE = 5000
+PARITY_COLUMNS = ['날짜', '객실타입', '판매처', '가격', '기준가', '격차']
+
+# 투숙 임박 땡처리 판정 - 리드타임 구간(임박 <= 3일, 중간 4~7일, 사전 > 7일) 평균가 비교
+DUMPING_NEAR_DAYS = 3
+DUMPING_FAR_DAYS = 7
+# 사전 평균가 대비 임박 평균가 하락률이 이 값을 넘으면 땡처리 (0.15 = 85% 미만)
+DUMPING_DROP = 0.15
+DUMPING_COLUMNS = ['임박평균', '중간평균', '사전평균', '하락률', '추세']
+
+# 가격 시뮬레이터 조정 범위 (엠버 최저가 기준 ±15만원, 5천원 단위) 및 가격-순위 곡선 컬럼
+SIM_DELTA_RANGE = 150000
+SIM_DELTA_STEP = 5000
+SIM_DELTAS = np.arange(-SIM_DELTA_RANGE, SIM_DELTA_RANGE + 1, SIM_DELTA_STEP)
+PRICE_CURVE_COLUMNS = ['날짜', '객실코드', '기준가', '조정액', '가격', '순위', '전체']
+
+# 최저가 매트릭스 셀 신호 (엠버 최저가 대비) -> 셀 배경색
+MATRIX_COLUMNS = ['호텔명', '날짜', '가격', '판매처', '객실타입', '신호']
+MATRIX_SIGNAL_STYLES = {
+    'danger': 'background-color: #ffcccc; color: #d32f2f;',
+    'warn': 'background-color: #fff3cd;',
+    'ok': 'background-color: #d4edda;',
+    '': '',
+}
+
+
+def mpi_strategy(kpis):
+    """MPI 구간별 오늘의 경영 전략/실행 지침 문구"""
+    mpi, comp_min, amber_avg = kpis['mpi'], kpis['comp_min'], kpis['amber_avg']
+    if mpi < 75:
+        strategy = "🔥 공격적 점유율 확대 구간 (Aggressive Growth)"
+        action = f"경쟁사 최저가({comp_min:,.0f}원) 대비 현재 엠버는 매우 강력한 가격 우위에 있습니다. 점유율 65% 달성 전까지는 현재가 유지가 유리하나, 주말(토) 요금은 즉시 {amber_avg*1.15:,.0f}원으로 상향 조정을 제안합니다."
+    elif 75 <= mpi < 95:
+        strategy = "⚖️ 수익성-점유율 균형 구간 (Balanced Yield)"
+        action = "핵심 채널(아고다/트립닷컴)의 요금을 실시간 모니터링하여 MPI를 90%선까지 야금야금 끌어올리며 마진을 확보해야 합니다."
+    else:
+        strategy = "💎 프리미엄 수익 극대화 구간 (Premium Value)"
+        action = "시장 평균보다 고가입니다. 객실 가동률이 50% 미만으로 떨어지지 않도록 투숙 3일 전 땡처리 물량을 전략적으로 배분하십시오."
+    return strategy, action
+
+
+def apply_filters(frame, dates, hotels, channels, room_codes):
+    """사이드바 필터 적용 (엠버 호텔은 선택한 객실코드만, 타 호텔은 그대로) - 원본/rollup 공용"""
+    mask = frame['날짜'].isin(dates) & frame['호텔명'].isin(hotels) & frame['판매처'].isin(channels)
+    if room_codes:
+        mask &= (~frame['엠버여부']) | frame['객실코드'].isin(room_codes)
+    return frame[mask]
+
+
+def _weighted_moments(frame):
+    """행별 (건수, 가격 합, 가격 제곱합) - 보존 정책으로 축약된 행(집계건수 있음)은 일 평균가/표준편차 x 집계건수로 복원
+    (축약 행의 '가격' 은 일 최저가라 그대로 평균내면 평균이 최저가 쪽으로 끌려감)"""
+    price = frame['가격'].to_numpy(dtype=float)
+    if '집계건수' not in frame.columns:
+        return np.ones(len(price)), price, price ** 2
+    count = frame['집계건수'].to_numpy(dtype=float)
+    compacted = ~np.isnan(count)
+    mean = np.where(compacted, frame['평균가'].to_numpy(dtype=float), price)
+    # 표준편차가 없는(이전 버전) 축약 행은 일 내 편차 0 으로 간주
+    std = np.nan_to_num(frame['표준편차'].to_numpy(dtype=float)) if '표준편차' in frame.columns else 0.0
+    weight = np.where(compacted, count, 1.0)
+    return weight, weight * mean, weight * (np.where(compacted, std, 0.0) ** 2 + mean ** 2)
+
+
+def _high_prices(frame):
+    """행별 최고가 (축약 행은 일 최고가, 원본 행은 가격)"""
+    if '최고가' not in frame.columns:
+        return frame['가격']
+    return frame['최고가'].astype(float).fillna(frame['가격'])
+
+
+def find_parity_breaks(amber_df, tolerance=PARITY_TOLERANCE):
+    """(날짜, 객실타입, 판매처, 격차) 단위 가격 역전 목록을 격차 큰 순으로 반환"""
+    if amber_df.empty:
+        return pd.DataFrame(columns=PARITY_COLUMNS)
+    official = _high_prices(amber_df).groupby([amber_df['날짜'], amber_df['객실타입']], observed=True).transform('max')
+    gap = official - amber_df['가격']
+    broken = gap > tolerance
+    breaks = amber_df.loc[broken, ['날짜', '객실타입', '판매처', '가격']].assign(기준가=official[broken], 격차=gap[broken])
+    return breaks.sort_values('격차', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def detect_dumping(f_df, by=('호텔명',), drop=DUMPING_DROP):
+    """경쟁 호텔의 리드타임 구간별 평균가를 한 번에 피벗해 하락률이 drop 을 넘는 그룹을 하락률 큰 순으로 반환
+    (by=('호텔명', '날짜') 로 주면 투숙일별로 판정 -> 전체 투숙일을 한 번에 계산)"""
+    by = list(by)
+    comp = f_df[~f_df['엠버여부']]
+    lead = comp['리드타임'].to_numpy(dtype=float)
+    bucket = np.select([np.isnan(lead), lead <= DUMPING_NEAR_DAYS, lead <= DUMPING_FAR_DAYS], [-1, 0, 1], 2)
+    valid = bucket >= 0
+    if not valid.any():
+        return pd.DataFrame(columns=by + DUMPING_COLUMNS)
+    comp = comp[valid]
+    weight, total, _ = _weighted_moments(comp)
+    sums = (pd.DataFrame({'합계': total, '가중치': weight}, index=comp.index)
+            .groupby([comp[k] for k in by] + [pd.Series(bucket[valid], index=comp.index, name='구간')], observed=True).sum())
+    means = (sums['합계'] / sums['가중치']).unstack('구간').reindex(columns=[0, 1, 2])
+    means.columns = DUMPING_COLUMNS[:3]
+    means['하락률'] = 1 - means['임박평균'] / means['사전평균']
+    # 임박가 < 중간가 < 사전가 면 점진적 인하, 아니면 투숙 3일 이내에 몰린 급락
+    steady = (means['임박평균'] < means['중간평균']) & (means['중간평균'] < means['사전평균'])
+    means['추세'] = np.where(steady, '지속 하락', '임박 급락')
+    flagged = means[means['하락률'] > drop]
+    return flagged.sort_values('하락률', ascending=False, kind='stable').reset_index()
+
+
+def build_min_matrix(f_df, amber_min_val):
+    """(호텔명, 날짜)별 최저가 행(가격/판매처/객실)과 엠버 대비 신호를 한 번에 계산"""
+    if f_df.empty:
+        return pd.DataFrame(columns=MATRIX_COLUMNS)
+    # 그룹별 최저가 행 위치 (동일가면 먼저 수집된 행 -> 기존 정렬 후 첫 행과 동일)
+    min_idx = f_df.groupby(['호텔명', '날짜'], observed=True)['가격'].idxmin()
+    cells = f_df.loc[min_idx.to_numpy(), MATRIX_COLUMNS[:-1]].reset_index(drop=True)
+    price = cells['가격'].to_numpy()
+    if amber_min_val:
+        cells['신호'] = np.select([price < amber_min_val - 30000, price < amber_min_val], ['danger', 'warn'], 'ok')
+    else:
+        cells['신호'] = ''
+    return cells
+
+
+def render_min_matrix_html(cells, dates=None):
+    """최저가 매트릭스를 HTML 표로 렌더링 (dates 를 주면 해당 투숙일 열만 -> 페이지 단위 렌더링)"""
+    if dates is None:
+        dates = sorted(cells['날짜'].unique())
+    page = cells[cells['날짜'].isin(dates)]
+    lookup = {(row.호텔명, row.날짜): row for row in page.itertuples(index=False)}
+    hotels = sorted(str(h) for h in page['호텔명'].unique())
+
+    header = ''.join(f'<th class="col_heading">{html.escape(str(d))}</th>' for d in dates)
+    body = []
+    for hotel in hotels:
+        tds = []
+        for date in dates:
+            row = lookup.get((hotel, date))
+            if row is None:
+                tds.append('<td>-</td>')
+                continue
+            detail = html.escape(f"({row.판매처}/{str(row.객실타입)[:10]})")
+            tds.append(f"<td style='{MATRIX_SIGNAL_STYLES[row.신호]}'><div class='price-font'>{row.가격:,.0f}원</div>"
+                       f"<div class='small-font'>{detail}</div></td>")
+        body.append(f'<tr><th class="row_heading">{html.escape(hotel)}</th>{"".join(tds)}</tr>')
+    return f'<table><thead><tr><th class="blank"></th>{header}</tr></thead><tbody>{"".join(body)}</tbody></table>'
+
+
+class RankSimulator:
+    """경쟁사 가격을 (투숙일, 가격) 순으로 한 번만 정렬해 두고 후보 가격 벡터의 시장 순위를 searchsorted 로 일괄 계산
+    (순위 = 후보가보다 싼 경쟁 상품 수 + 1, 전체 = 경쟁 상품 수 + 1 -> 기존 append/sort 방식과 동일)"""
+
+    def __init__(self, comp_df):
+        price = comp_df['가격'].to_numpy(dtype=float)
+        codes, dates = pd.factorize(comp_df['날짜'])
+        order = np.lexsort((price, codes))
+        self._sorted = price[order]
+        bounds = np.searchsorted(codes[order], np.arange(len(dates) + 1))
+        self._slices = {date: (bounds[i], bounds[i + 1]) for i, date in enumerate(dates)}
+        self._pooled = np.sort(price)
+
+    def prices(self, date=None):
+        """정렬된 경쟁가 (date 가 없으면 선택 투숙일 전체를 합친 가격)"""
+        if date is None:
+            return self._pooled
+        lo, hi = self._slices.get(date, (0, 0))
+        return self._sorted[lo:hi]
+
+    def rank(self, candidates, date=None):
+        comp = self.prices(date)
+        return np.searchsorted(comp, np.asarray(candidates, dtype=float), side='left') + 1, len(comp) + 1
+
+
+def price_curve(amber_df, simulator, deltas=SIM_DELTAS):
+    """엠버 (투숙일, 객실코드)별 현재 최저가에 조정액을 더한 가격들의 예상 순위 (같은 투숙일 경쟁가 기준)"""
+    base = amber_df.groupby(['날짜', '객실코드'], observed=True)['가격'].min()
+    if base.empty:
+        return pd.DataFrame(columns=PRICE_CURVE_COLUMNS)
+    deltas = np.asarray(deltas)
+    frames = []
+    for date, group in base.groupby(level='날짜', observed=True, sort=False):
+        # (객실 수 x 조정액 수) 후보 가격을 투숙일당 searchsorted 한 번으로 처리
+        candidates = (group.to_numpy(dtype=float)[:, None] + deltas[None, :]).ravel()
+        rank, total = simulator.rank(candidates, date)
+        frames.append(pd.DataFrame({
+            '날짜': date,
+            '객실코드': np.repeat(group.index.get_level_values('객실코드').to_numpy(), len(deltas)),
+            '기준가': np.repeat(group.to_numpy(), len(deltas)),
+            '조정액': np.tile(deltas, len(group)),
+            '가격': candidates,
+            '순위': rank,
+            '전체': total,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def filter_key(data_version, dates, hotels, channels, room_codes):
+    """데이터 버전 + 사이드바 선택값의 해시 (선택 순서와 무관)"""
+    payload = [str(data_version)] + [sorted(map(str, values)) for values in (dates, hotels, channels, room_codes)]
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def compute_kpis(f_df, major_channels=MAJOR_CHANNELS):
+    """MPI/평균가/최저가/안정성 등 KPI 를 (엠버 주요채널, 엠버 기타, 경쟁사) 그룹 한 번의 집계로 계산
+    (평균/표준편차는 축약 행을 집계건수만큼 가중 -> 축약 전후 결과가 같음)"""
+    price = f_df['가격'].to_numpy(dtype=float)
+    weight, total, sq = _weighted_moments(f_df)
+    is_ember = f_df['엠버여부'].to_numpy(dtype=bool)
+    is_major = f_df['판매처'].isin(major_channels).to_numpy()
+    group = np.where(is_ember, np.where(is_major, 'amber_major', 'amber_other'), 'comp')
+    stats = (pd.DataFrame({'구분': group, '가격': price, '가중치': weight, '합계': total, '제곱': sq})
+             .groupby('구분').agg(n=('가중치', 'sum'), total=('합계', 'sum'), low=('가격', 'min'), sq=('제곱', 'sum'))
+             .reindex(['amber_major', 'amber_other', 'comp']).fillna({'n': 0, 'total': 0, 'sq': 0}))
+
+    amber = stats.loc[['amber_major', 'amber_other']]
+    amber_n, amber_total, comp_n = amber['n'].sum(), amber['total'].sum(), stats.at['comp', 'n']
+    major_n = stats.at['amber_major', 'n']
+
+    amber_avg = amber_total / amber_n if amber_n else np.nan
+    market_avg = stats.at['comp', 'total'] / comp_n if comp_n else np.nan
+    # 표본 표준편차 (ddof=1)
+    amber_std = np.sqrt(max(0.0, (amber['sq'].sum() - amber_total ** 2 / amber_n) / (amber_n - 1))) if amber_n > 1 else np.nan
+    major_avg = stats.at['amber_major', 'total'] / major_n if major_n else np.nan
+    all_n = amber_n + comp_n
+    if all_n:
+        # 원본 행이면 행수, 축약 행이면 집계건수 기준 최다 채널
+        channel_counts = f_df['판매처'].value_counts() if (weight == 1).all() else \
+            pd.Series(weight, index=f_df.index).groupby(f_df['판매처'], observed=True).sum()
+    return {
+        'has_amber': bool(amber_n),
+        'has_comp': bool(comp_n),
+        'amber_avg': amber_avg,
+        'amber_min': amber['low'].min() if amber_n else 0,
+        'amber_std': amber_std,
+        'market_avg': market_avg,
+        'comp_min': stats.at['comp', 'low'] if comp_n else 0,
+        'mpi': amber_avg / market_avg * 100 if amber_n and comp_n else np.nan,
+        'major_avg': major_avg,
+        'price_gap': major_avg / market_avg * 100 if major_n and comp_n else np.nan,
+        'stability': 100 - (amber_std / amber_avg * 100) if amber_n and amber_avg > 0 else 0,
+        'all_min': stats['low'].min() if all_n else np.nan,
+        'all_avg': (amber_total + stats.at['comp', 'total']) / all_n if all_n else np.nan,
+        'top_channel': channel_counts.idxmax() if all_n else None,
+    }
+
+
+def _min_rollup(frame, keys):
+    return frame.groupby(keys, observed=True, dropna=False, sort=False)['가격'].min().reset_index()
+
+
+class PriceRollups:
+    """리드타임/수집일 추이 차트용 최저가 사전 집계 (신규 수집분만 집계해 기존 테이블에 병합)
+    - 수집일 파티션별로 보관 -> 갱신 비용은 신규 수집분이 닿은 날(보통 오늘)의 집계 크기에만 비례
+    - 파티션 dict 와 합친 테이블은 갱신 때마다 재할당 (얕은 복사한 스냅샷은 그 시점 집계를 유지)"""
+
+    def __init__(self):
+        # 집계 이름 -> {수집일: 그 날 수집분의 최저가 집계}
+        self._parts = {'lead_time': {}, 'collection': {}}
+        # 파티션을 합친 테이블 (처음 읽을 때 만들고 갱신/삭제 시 비움)
+        self._tables = {}
+
+    @property
+    def lead_time(self):
+        return self._table('lead_time')
+
+    @property
+    def collection(self):
+        return self._table('collection')
+
+    def _table(self, name):
+        table = self._tables.get(name)
+        if table is None:
+            parts = self._parts[name]
+            table = concat_prices([parts[day] for day in sorted(parts)])
+            self._tables = {**self._tables, name: table}
+        return table
+
+    @staticmethod
+    def _merge(parts, new_frame, keys):
+        parts = dict(parts)
+        rollup = _min_rollup(new_frame, keys)
+        # 수집일 순으로 한 번만 정렬해 구간별로 잘라 파티션 생성 (수집일마다 groupby 하지 않음)
+        codes, days = pd.factorize(rollup['수집일'])
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(days) + 1))
+        rollup = rollup.take(order)
+        for i, day in enumerate(days):
+            part = rollup.iloc[bounds[i]:bounds[i + 1]]
+            old = parts.get(day)
+            # 최저가의 최저가 = 전체 최저가 -> 원본 행을 다시 볼 필요 없음
+            parts[day] = part.reset_index(drop=True) if old is None else _min_rollup(concat_prices([old, part]), keys)
+        return parts
+
+    def update(self, new_frame):
+        if new_frame.empty:
+            return
+        self._parts = {'lead_time': self._merge(self._parts['lead_time'], new_frame, LEAD_TIME_KEYS),
+                       'collection': self._merge(self._parts['collection'], new_frame, COLLECTION_KEYS)}
+        self._tables = {}
+
+    def prune(self, before_day):
+        """보존 기간이 지난 수집일 집계 삭제 (원본 프레임과 같은 수집일 기준, 파티션 단위로 버림)"""
+        self._parts = {name: {day: part for day, part in parts.items() if day >= before_day}
+                       for name, parts in self._parts.items()}
+        self._tables = {}
+
+
+def lead_time_trend(lead_time_rollup):
+    """리드타임별 호텔 최저가 (필터 적용된 rollup 입력)"""
+    return lead_time_rollup.groupby(['리드타임', '호텔명'], observed=True)['가격'].min().reset_index()
+
+
+def collection_trends(collection_rollup):
+    """투숙일 -> 수집일별 호텔 최저가 프레임 dict (투숙일마다 원본을 다시 거르지 않고 한 번에 집계)"""
+    trend = collection_rollup.groupby(['날짜', '수집일', '호텔명'], observed=True)['가격'].min().reset_index()
+    return {date: group.drop(columns='날짜') for date, group in trend.groupby('날짜', sort=False)}
@@ -1,12 +1,18 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
-import numpy as np
 from datetime import datetime
 import firebase_admin
 from firebase_admin import credentials, firestore
 import json
+from analytics import (SIM_DELTA_RANGE, SIM_DELTA_STEP, apply_filters, collection_trends, lead_time_trend, mpi_strategy,
+                       price_curve, render_min_matrix_html)
+from charts import heatmap_figure, line_figure
+from engine import TARGET_HOTELS, Selection, create_sync
+from normalize import EMBER_ROOM_CODES, EMBER_ROOM_GROUPS
+from price_store import PriceStore
+from profiling import PROFILE_ENABLED, Profiler
+from worker import EXTERNAL_WORKER, PrecomputeWorker, SnapshotStore, report_for
 
 # 1. 페이지 설정 및 디자인
 st.set_page_config(page_title="엠버 AI 지배인 v6.2", layout="wide")
@@ -99,62 +105,117 @@ def init_firebase():
 
 db = init_firebase()
 
-@st.cache_data(ttl=5) # 5초 실시간 갱신
-def load_data():
+# 최저가 매트릭스 한 페이지에 렌더링할 투숙일 수
+MATRIX_PAGE_SIZE = 14
+
+# 프로세스 전체가 하나의 동기화 객체를 공유 (디스크 Parquet 캐시 + 워터마크 이후 신규 문서만 읽음)
+@st.cache_resource
+def get_price_sync():
+    return create_sync(db, store=PriceStore())
+
+# 스냅샷 파일은 외부 워커 프로세스와 주고받을 때만 사용 (프로세스 내 워커는 메모리로 전달)
+@st.cache_resource
+def get_snapshot_store():
+    return SnapshotStore(persist=EXTERNAL_WORKER)
+
+# 백그라운드 사전 계산 워커 - 프로세스당 1개, PRECOMPUTE_INTERVAL(기본 5초)마다 동기화/기본 리포트 계산
+# (python worker.py 로 별도 프로세스를 돌릴 때는 AMBER_EXTERNAL_WORKER=1 로 끔)
+@st.cache_resource
+def get_worker():
+    if EXTERNAL_WORKER:
+        return None
+    return PrecomputeWorker(get_price_sync(), get_snapshot_store()).start()
+
+def load_snapshot():
     try:
-        # Firebase에서 데이터 스트림
-        docs = db.collection("Hotel_Prices").stream()
-        data_list = [doc.to_dict() for doc in docs]
-        
-        if not data_list:
-            return pd.DataFrame()
-        
-        data = pd.DataFrame(data_list)
-        
-        # [중요] Firebase 컬럼(영어)을 지배인님 기존 코드 컬럼(한글)으로 매핑
-        data = data.rename(columns={
-            'hotel_name': '호텔명',
-            'target_date': '날짜',
-            'room_name': '객실타입',
-            'channel': '판매처',
-            'price': '가격',
-            'collected_at': '수집시간'
-        })
-        
-        # [데이터 정밀 정제 - 원본 로직 100% 유지]
-        data['호텔명'] = data['호텔명'].astype(str).str.replace(" ", "").str.strip()
-        data['날짜'] = data['날짜'].astype(str).str.replace(" ", "").str.strip()
-        data['객실타입'] = data['객실타입'].astype(str).str.strip()
-        data['판매처'] = data['판매처'].astype(str).str.strip()
-        # 가격 데이터 전처리 (쉼표 제거 등 안전장치 포함)
-        data['가격'] = data['가격'].astype(str).str.replace(',', '').str.replace('원', '')
-        data['가격'] = pd.to_numeric(data['가격'], errors='coerce')
-        
-        # 날짜 데이터 처리 (그래프 핵심 컬럼)
-        data['수집시간_dt'] = pd.to_datetime(data['수집시간'], errors='coerce')
-        # 수집일을 문자열로 변환하여 에러 방지
-        data['수집일'] = data['수집시간_dt'].dt.strftime('%Y-%m-%d')
-        data['투숙일_dt'] = pd.to_datetime(data['날짜'], errors='coerce')
-        
-        data = data.dropna(subset=['호텔명', '가격', '날짜', '수집일'])
-        
-        # 리드타임 계산 (투숙일 - 수집일)
-        data['리드타임'] = (data['투숙일_dt'] - data['수집시간_dt']).dt.days
-        
-        # 필수 데이터 누락 제거 및 150만원 상한 필터
-        data = data.dropna(subset=['호텔명', '가격', '날짜'])
-        data = data[data['가격'] < 1500000]
-        
-        return data
+        # 세션은 워커가 만든 스냅샷만 읽음 -> 동시 접속자 수와 무관하게 Firestore 조회/집계는 워커 1회
+        get_worker()
+        return get_snapshot_store().read()
     except Exception as e:
-        # 에러 발생 시 빈 데이터프레임 반환 (앱 다운 방지)
-        return pd.DataFrame()
+        # 에러 발생 시 빈 스냅샷 처리 (앱 다운 방지)
+        return None
 
 # ------------------------------------------------------------------
-# 3. 메인 로직 (여기서부터 지배인님 원본 코드 100% 동일)
+# 무거운 섹션은 fragment 로 분리 -> 토글을 켰을 때만 계산/렌더링하고,
+# 섹션 안의 위젯 조작은 전체 스크립트가 아니라 해당 fragment 만 재실행
 # ------------------------------------------------------------------
-try:
-    df = load_data()
+TREND_PAGE_SIZE = 5      # 추이 그래프 페이지당 투숙일 수
+LOG_PAGE_SIZE = 200      # 상세 로그 페이지당 행 수
+
+@st.fragment
+def render_heatmap_section(amber_df):
+    st.subheader("💎 엠버 핵심 객실별/채널별 최저가 분포 (Heatmap)")
+    if not st.toggle("히트맵 보기", key="show_heatmap"):
+        return
+    if not amber_df.empty:
+        amber_pivot = amber_df.pivot_table(index='객실타입', columns='판매처', values='가격', aggfunc='min', observed=True)
+        st.plotly_chart(heatmap_figure(amber_pivot), use_container_width=True)
+
+@st.fragment
+def render_trend_section(rollups, filters):
+    st.subheader("📊 수집일 기준 가격 변동 추이 (일자별)")
+    if not st.toggle("투숙일별 추이 그래프 보기", key="show_trends"):
+        return
+    # 같은 날 수집된 데이터는 최저가로 그룹화하여 일자별 추이 생성 (전 투숙일 한 번에 집계)
+    date_trends = collection_trends(apply_filters(rollups.collection, *filters))
+    trend_dates = [date for date in filters[0] if date in date_trends]
+    page_count = max(1, -(-len(trend_dates) // TREND_PAGE_SIZE))
+    page = 1
+    if page_count > 1:
+        page = st.number_input(f"📄 추이 그래프 페이지 ({TREND_PAGE_SIZE}일 단위, 총 {page_count}쪽)", min_value=1, max_value=page_count, value=1)
+    for date in trend_dates[(page - 1) * TREND_PAGE_SIZE:page * TREND_PAGE_SIZE]:
+        # 같은 집계면 캐시된 그림 재사용 (시리즈당 점 수 상한 + 점이 많으면 WebGL)
+        fig = line_figure(date_trends[date], x='수집일', y='가격', color='호텔명',
+                          title=f"📅 {date} 투숙일의 수집일별 가격 흐름", x_title="데이터 수집일", y_title="최저가 (원)")
+        st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment
+def render_price_curve(report):
+    if not st.toggle("📈 객실별 가격-순위 곡선 보기", key="show_price_curve"):
+        return
+    # 엠버 객실코드 x 투숙일별 조정 가격 전체를 정렬된 경쟁가에 searchsorted 로 한 번에 순위 계산
+    curve = price_curve(report.amber_df, report.simulator)
+    if curve.empty:
+        st.info("선택한 필터에 엠버 객실 가격이 없습니다.")
+        return
+    curve_dates = sorted(curve['날짜'].unique())
+    date = st.selectbox("📅 곡선을 볼 투숙일", options=curve_dates, key="price_curve_date")
+    fig = line_figure(curve[curve['날짜'] == date], x='가격', y='순위', color='객실코드', hover_data=['조정액', '전체'],
+                      title=f"📅 {date} 객실별 가격 대비 예상 시장 순위", x_title="조정 후 가격 (원)",
+                      y_title="예상 순위 (1위 = 최저가)", reverse_y=True)
+    st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment
+def render_detail_log(f_df):
+    if not st.toggle("📋 상세 로그 보기", key="show_detail_log"):
+        return
+    page_count = max(1, -(-len(f_df) // LOG_PAGE_SIZE))
+    page = st.number_input(f"📄 로그 페이지 ({LOG_PAGE_SIZE}행 단위, 총 {len(f_df):,}행 / {page_count}쪽)", min_value=1, max_value=page_count, value=1)
+    log_df = f_df.sort_values(['날짜', '수집시간_dt'], ascending=[True, False])
+    st.dataframe(log_df.iloc[(page - 1) * LOG_PAGE_SIZE:page * LOG_PAGE_SIZE], use_container_width=True, hide_index=True)
+
+@st.fragment
+def render_outlier_audit(audit):
+    if not st.toggle(f"🧹 이상치 감사 로그 보기 (집계 제외 {len(audit):,}건)", key="show_outlier_audit"):
+        return
+    if audit.empty:
+        st.success("✅ 집계에서 제외된 이상치가 없습니다.")
+        return
+    st.caption("0원/상한 초과는 영구 제외, 호텔/객실/채널(주말 구분)별 최근 가격의 중앙값·MAD 기준으로 튀는 가격은 "
+               "보류 후 가격 수준이 따라오면 자동 복원")
+    cols = [c for c in ['수집시간_dt', '호텔명', '날짜', '객실타입', '판매처', '가격', '기준중앙값', '이상치점수', '사유'] if c in audit.columns]
+    st.dataframe(audit.sort_values('수집시간_dt', ascending=False)[cols].head(LOG_PAGE_SIZE), use_container_width=True, hide_index=True)
+
+# ------------------------------------------------------------------
+# 3. 메인 로직 - 계산은 engine(analytics) 에 맡기고 여기서는 화면만 그림
+# ------------------------------------------------------------------
+def main():
+    # 🛠️ 성능 계측 모드 (AMBER_PROFILE=1 이면 항상 켜짐)
+    profiler = Profiler(PROFILE_ENABLED or st.sidebar.toggle("🛠️ 성능 계측 모드", key="profile_mode"))
+    with profiler.section("스냅샷 로딩") as rec:
+        snapshot = load_snapshot()
+        df = snapshot.df if snapshot is not None else pd.DataFrame()
+        rec['행수'] = len(df)
     
     if not df.empty:
         # --- [사이드바 필터 구역] ---
@@ -162,8 +223,7 @@ try:
         all_dates = sorted(df['날짜'].unique())
         selected_dates = st.sidebar.multiselect("📅 분석 대상 투숙일 선택", options=all_dates, default=[all_dates[-1]] if all_dates else [])
         
-        target_list = ["엠버퓨어힐", "그랜드하얏트", "파르나스", "신라호텔", "롯데호텔", "신라스테이", "해비치", "신화메리어트", "히든클리프", "더시에나", "조선힐스위트", "메종글래드", "그랜드조선제주"]
-        selected_hotels = st.sidebar.multiselect("🏨 분석 대상 호텔 선택", options=sorted(df['호텔명'].unique()), default=[h for h in target_list if h in df['호텔명'].unique()])
+        selected_hotels = st.sidebar.multiselect("🏨 분석 대상 호텔 선택", options=sorted(df['호텔명'].unique()), default=[h for h in TARGET_HOTELS if h in df['호텔명'].unique()])
         
         all_channels = sorted(df['판매처'].unique())
         selected_channels = st.sidebar.multiselect("📱 판매처(채널) 필터", options=all_channels, default=all_channels)
@@ -171,39 +231,29 @@ try:
         # 🚀 엠버 10대 객실 개별 필터 로직
         st.sidebar.markdown("---")
         st.sidebar.subheader("💎 엠버 객실 정밀 선택")
-        ember_room_groups = {
-            "GDB (디럭스 더블)": ["그린밸리 디럭스 더블", "Green Valley Deluxe Double"],
-            "GDF (디럭스 패밀리)": ["그린밸리 디럭스 패밀리", "Green Valley Deluxe Family"],
-            "FDB (가든 더블)": ["포레스트 가든 더블", "Forest Garden Double"],
-            "FDE (가든 더블 EB)": ["포레스트 가든 더블 EB", "Forest Garden Double EB"],
-            "FDF (플로라 더블)": ["포레스트 플로라 더블", "포레스트 플로랄 더블", "Forest Flora Double", "Forest Floral Double"],
-            "FPT (펫 더블)": ["포레스트 펫 더블", "Forest Pet Double"],
-            "HDP (힐 파인 더블)": ["힐 파인 더블", "Hill Pine Double"],
-            "HDT (힐 엠버 트윈)": ["힐 엠버 트윈", "Hill Amber Twin"],
-            "HDF (힐 루나 패밀리)": ["힐 루나 패밀리", "Hill Luna Family"],
-            "PPV (풀빌라)": ["프라이빗 풀 빌라", "프라이빗 풀빌라", "Forest Private Pool Villa"]
-        }
-        selected_codes = st.sidebar.multiselect("🎯 분석 객실 선택", options=list(ember_room_groups.keys()), default=list(ember_room_groups.keys()))
-        
-        active_keywords = []
-        for code in selected_codes:
-            active_keywords.extend(ember_room_groups[code])
+        selected_labels = st.sidebar.multiselect("🎯 분석 객실 선택", options=list(EMBER_ROOM_GROUPS.keys()), default=list(EMBER_ROOM_GROUPS.keys()))
+        selected_codes = [EMBER_ROOM_CODES[label] for label in selected_labels]
+
+        # 마지막 증분 갱신의 정제 단계별 소요시간/메모리
+        with st.sidebar.expander("⏱️ 데이터 정제 성능 리포트"):
+            st.dataframe(pd.DataFrame(snapshot.sync_stats.get('정제 단계', [])), hide_index=True)
+            st.caption(f"스냅샷 생성: {snapshot.generated_at:%Y-%m-%d %H:%M:%S}")
+
+        # [분석 실행] 필터 -> KPI/파리티/땡처리/매트릭스를 엔진에서 한 번에 계산
+        # (기본 필터는 워커가 미리 계산한 리포트, 그 외는 데이터 버전 + 선택값 해시로 프로세스 전역 캐시)
+        selection = Selection(tuple(selected_dates), tuple(selected_hotels), tuple(selected_channels), tuple(selected_codes))
+        filters = selection.filters
+        with profiler.section("분석 리포트 (필터/KPI/파리티/땡처리/매트릭스)") as rec:
+            report = report_for(snapshot, selection)
+            # 추이 차트는 원본 대신 사전 집계(rollup)에 같은 필터를 적용해 사용
+            rollups = snapshot.rollups
+            rec['행수'] = len(report.f_df)
+
+        f_df, amber_df, comp_df, kpis = report.f_df, report.amber_df, report.comp_df, report.kpis
+        parity_breaks = report.parity_breaks
 
-        # [1차 필터링 실행]
-        f_df = df[(df['날짜'].isin(selected_dates)) & (df['호텔명'].isin(selected_hotels)) & (df['판매처'].isin(selected_channels))]
-        
-        # [엠버 전용 필터 적용]
-        if active_keywords:
-            ember_mask = f_df['호텔명'].str.contains("엠버", na=False)
-            # 엠버 호텔은 키워드 포함된 것만 유지, 타 호텔은 그대로 유지
-            f_df = f_df[ (~ember_mask) | (f_df['객실타입'].str.contains('|'.join(active_keywords), na=False)) ]
-
-        # [데이터 분리 및 최저가 재산출] - 하단 리포트 로직용 변수 보존
-        amber_df = f_df[f_df['호텔명'].str.contains("엠버", na=False)]
-        comp_df = f_df[~f_df['호텔명'].str.contains("엠버", na=False)]
-        
         # 엠버 데이터 정밀 추출용 가격 변수 및 호환성 유지
-        amber_min_val = amber_df['가격'].min() if not amber_df.empty else 0
+        amber_min_val = kpis['amber_min']
         amber_in_filter = amber_df
         # ---------------------------------------------------------
         # 🤖 AI 자동 경영 분석 리포트 모듈 (수정 완료)
@@ -211,35 +261,24 @@ try:
         st.markdown('<div class="ai-report-card">', unsafe_allow_html=True)
         st.subheader("📊 AI 수익 경영 정밀 리포트")
 
-        if not amber_df.empty and not comp_df.empty:
-            # 1. 상세 지표 계산
-            amber_avg = amber_df['가격'].mean()
-            comp_min = comp_df['가격'].min()
-            market_avg = comp_df['가격'].mean()
-            mpi = (amber_avg / market_avg) * 100
+        if kpis['has_amber'] and kpis['has_comp']:
+            # 1. 상세 지표 (공용 KPI 집계 사용)
+            amber_avg = kpis['amber_avg']
+            comp_min = kpis['comp_min']
+            market_avg = kpis['market_avg']
+            mpi = kpis['mpi']
     
             # 2. 상황별 맞춤 메시지 생성 (프롬프트 핵심)
-            if mpi < 75:
-                strategy = "🔥 공격적 점유율 확대 구간 (Aggressive Growth)"
-                action = f"경쟁사 최저가({comp_min:,.0f}원) 대비 현재 엠버는 매우 강력한 가격 우위에 있습니다. 점유율 65% 달성 전까지는 현재가 유지가 유리하나, 주말(토) 요금은 즉시 {amber_avg*1.15:,.0f}원으로 상향 조정을 제안합니다."
-            elif 75 <= mpi < 95:
-                strategy = "⚖️ 수익성-점유율 균형 구간 (Balanced Yield)"
-                action = "핵심 채널(아고다/트립닷컴)의 요금을 실시간 모니터링하여 MPI를 90%선까지 야금야금 끌어올리며 마진을 확보해야 합니다."
-            else:
-                strategy = "💎 프리미엄 수익 극대화 구간 (Premium Value)"
-                action = "시장 평균보다 고가입니다. 객실 가동률이 50% 미만으로 떨어지지 않도록 투숙 3일 전 땡처리 물량을 전략적으로 배분하십시오."
+            strategy, action = mpi_strategy(kpis)
 
             # --- [여기서부터 복사해서 붙여넣으세요] ---
             
             st.markdown("---") # 구분선 하나 넣어주면 깔끔합니다.
-            major_channels = ['아고다', '트립닷컴']
-            # 엠버의 아고다/트립닷컴 데이터만 추출
-            amber_major_df = amber_df[amber_df['판매처'].isin(major_channels)]
-            
-            if not amber_major_df.empty:
-                major_avg = amber_major_df['가격'].mean()
+            # 엠버의 아고다/트립닷컴 평균 (공용 KPI 집계에서 함께 산출)
+            if pd.notna(kpis['major_avg']):
+                major_avg = kpis['major_avg']
                 # 시장 평균 대비 엠버의 글로벌 채널 가격 지수
-                price_gap = (major_avg / market_avg) * 100
+                price_gap = kpis['price_gap']
                 
                 st.write(f"🌐 **글로벌 주요 채널 분석 (아고다/트립닷컴)**")
                 col1, col2 = st.columns(2)
@@ -281,22 +320,20 @@ try:
         st.markdown('<div class="gm-card">', unsafe_allow_html=True)
         st.subheader("🏁 Executive Summary (경영 지표 요약)")
         
-        if not amber_df.empty and not comp_df.empty:
+        if kpis['has_amber'] and kpis['has_comp']:
             kpi1, kpi2, kpi3 = st.columns(3)
             
             # 1. MPI (Market Penetration Index)
-            amber_avg = amber_df['가격'].mean()
-            market_avg = comp_df['가격'].mean()
-            mpi = (amber_avg / market_avg) * 100
+            amber_avg = kpis['amber_avg']
+            mpi = kpis['mpi']
             kpi1.metric("시장 지배력 지수(MPI)", f"{mpi:.1f}%", f"{mpi-100:+.1f}% vs 시장평균")
             
             # 2. 가격 안정성 점수
-            price_std = amber_df['가격'].std()
-            stability = 100 - (price_std / amber_avg * 100) if amber_avg > 0 else 0
+            stability = kpis['stability']
             kpi2.metric("가격 방어 안정성", f"{max(0, stability):.1f}점", "채널별 균등가 유지")
             
             # 3. 투숙 임박 수익 기회 (경쟁사 땡처리 대비 엠버의 프리미엄폭)
-            comp_min = comp_df['가격'].min()
+            comp_min = kpis['comp_min']
             kpi3.metric("프리미엄 수익폭", f"{amber_avg - comp_min:,.0f}원", "경쟁사 최저가 대비")
         else:
             st.info("💡 사이드바에서 '엠버퓨어힐'과 '비교 호텔'을 모두 선택하시면 경영 지표가 산출됩니다.")
@@ -311,22 +348,14 @@ try:
             col_a, col_b = st.columns(2)
             with col_a:
                 st.write("🚩 **긴급 점검 및 조치**")
-                parity_issue = False
-                if not amber_in_filter.empty:
-                    for (date, room), group in amber_in_filter.groupby(['날짜', '객실타입']):
-                        if group['가격'].min() < group['가격'].max() - 5000: parity_issue = True
+                parity_issue = not parity_breaks.empty
                 
                 if parity_issue: st.write("- 🚨 현재 일부 채널에서 **가격 역전**이 감지되었습니다. 즉시 확인하십시오.")
                 else: st.write("- ✅ 모든 채널의 가격 파리티가 깨끗합니다.")
 
-                dumping_list = []
-                for h in selected_hotels:
-                    if "엠버" in h: continue
-                    h_data = f_df[f_df['호텔명'] == h]
-                    if not h_data.empty and h_data['리드타임'].min() <= 3:
-                        recent_p = h_data[h_data['리드타임'] <= 3]['가격'].mean()
-                        prev_p = h_data[h_data['리드타임'] > 7]['가격'].mean()
-                        if recent_p < prev_p * 0.85: dumping_list.append(h)
+                # 리드타임 구간 평균가 피벗 결과 (하락률 큰 순, 추세 포함)
+                dumping = report.dumping
+                dumping_list = [f"{row.호텔명}(-{row.하락률:.0%}, {row.추세})" for row in dumping.itertuples(index=False)]
                 
                 if dumping_list: st.write(f"- 🚨 **{', '.join(dumping_list)}**가 투숙 임박 땡처리를 진행 중입니다.")
                 else: st.write("- 🕊️ 경쟁사들의 급격한 투매 징후는 발견되지 않았습니다.")
@@ -334,7 +363,7 @@ try:
             with col_b:
                 st.write("📈 **매출 극대화 제안**")
                 if amber_min_val > 0:
-                    comp_min = comp_df['가격'].min() if not comp_df.empty else 0
+                    comp_min = kpis['comp_min']
                     if amber_min_val > comp_min + 50000: st.write("- 📉 시장 대비 엠버가 고가입니다. 소폭 인하로 예약 선점이 필요합니다.")
                     elif amber_min_val < comp_min - 30000: st.write("- 💰 엠버가 압도적 저가입니다! 만 원 정도 인상하여 수익률을 높이십시오.")
                     else: st.write("- ✨ 현재 적정 시장가를 유지 중입니다. 현 상태를 유지하십시오.")
@@ -343,14 +372,9 @@ try:
         # 🟢 실시간 가격 역전 상세 알림
         st.subheader("⚠️ 실시간 가격 역전 상세 알림")
         if not amber_in_filter.empty:
-            parity_alerts = []
-            for (date, room), group in amber_in_filter.groupby(['날짜', '객실타입']):
-                official_price = group['가격'].max()
-                broken_channels = group[group['가격'] < official_price]
-                for _, row in broken_channels.iterrows():
-                    gap = official_price - row['가격']
-                    if gap > 5000:
-                        parity_alerts.append(f"🚨 **[가격 무너짐]** {row['날짜']} | {row['객실타입']} | **{row['판매처']}** 가 기준보다 **{gap:,.0f}원** 낮음!")
+            # 격차 큰 순 상위 5건만 문자열로 생성
+            parity_alerts = [f"🚨 **[가격 무너짐]** {row.날짜} | {row.객실타입} | **{row.판매처}** 가 기준보다 **{row.격차:,.0f}원** 낮음!"
+                             for row in parity_breaks.head(5).itertuples(index=False)]
             
             if parity_alerts:
                 for alert in parity_alerts[:5]: st.markdown(f'<div class="parity-alert">{alert}</div>', unsafe_allow_html=True)
@@ -359,33 +383,20 @@ try:
         # 📉 [핵심 기능 2] 경쟁사 땡처리 추적 (Booking Pace)
         st.subheader("📉 투숙 임박 땡처리 추적 (Lead-time Analysis)")
         
-        pace_trend = f_df.groupby(['리드타임', '호텔명'])['가격'].min().reset_index()
-        fig_pace = px.line(pace_trend, x='리드타임', y='가격', color='호텔명', markers=True, title="리드타임별 최저가 추이 (오른쪽이 투숙일 임박)")
-        fig_pace.update_xaxes(autorange="reversed")
-        st.plotly_chart(fig_pace, use_container_width=True)
+        with profiler.section("리드타임 차트 (Plotly 직렬화 포함)") as rec:
+            pace_trend = lead_time_trend(apply_filters(rollups.lead_time, *filters))
+            fig_pace = line_figure(pace_trend, x='리드타임', y='가격', color='호텔명', title="리드타임별 최저가 추이 (오른쪽이 투숙일 임박)",
+                                   reverse_x=True)
+            st.plotly_chart(fig_pace, use_container_width=True)
+            rec['행수'] = len(pace_trend)
 
         st.markdown("---")
 
         # 🚦 일자별 호텔 상세 최저가 매트릭스 (인덱스 복구 및 열 너비 고정형)
         st.subheader("🚦 일자별 호텔 상세 최저가 매트릭스 (판매처/객실 포함)")
         
-        def get_min_detail(x):
-            if x.empty: return "-"
-            # 무조건 가격이 가장 낮은 행을 첫 번째로 가져옴 (20만원대 요금 확보)
-            min_row = x.sort_values(by='가격', ascending=True).iloc[0]
-            return f"<div class='price-font'>{min_row['가격']:,.0f}원</div><div class='small-font'>({min_row['판매처']}/{min_row['객실타입'][:10]})</div>"
-
-        # 데이터 피벗
-        detail_pivot = f_df.groupby(['호텔명', '날짜']).apply(get_min_detail).unstack()
-
-        def color_signal(val):
-            if val == "-" or amber_min_val == 0: return ''
-            try:
-                price_val = int(val.split('원')[0].split('>')[-1].replace(',', ''))
-                if price_val < amber_min_val - 30000: return 'background-color: #ffcccc; color: #d32f2f;'
-                if price_val < amber_min_val: return 'background-color: #fff3cd;'
-                return 'background-color: #d4edda;'
-            except: return ''
+        # 데이터 피벗 - 엔진 리포트의 셀별 최저가(idxmin)와 숫자 기준 신호색 사용
+        matrix_cells = report.matrix_cells
 
         # [지배인님 커스텀 포인트] CSS 주입
         st.markdown(f"""
@@ -427,8 +438,17 @@ try:
             </style>
         """, unsafe_allow_html=True)
 
-        # HTML 렌더링
-        st.write(detail_pivot.style.applymap(color_signal).to_html(escape=False), unsafe_allow_html=True)
+        # HTML 렌더링 - 투숙일이 많으면 MATRIX_PAGE_SIZE 일 단위로 나눠 현재 페이지만 렌더링
+        matrix_dates = sorted(matrix_cells['날짜'].unique())
+        page_count = max(1, -(-len(matrix_dates) // MATRIX_PAGE_SIZE))
+        page = 1
+        if page_count > 1:
+            page = st.number_input(f"📄 매트릭스 페이지 ({MATRIX_PAGE_SIZE}일 단위, 총 {page_count}쪽)", min_value=1, max_value=page_count, value=1)
+        page_dates = matrix_dates[(page - 1) * MATRIX_PAGE_SIZE:page * MATRIX_PAGE_SIZE]
+        with profiler.section("최저가 매트릭스 렌더링") as rec:
+            matrix_html = render_min_matrix_html(matrix_cells, page_dates)
+            st.write(matrix_html, unsafe_allow_html=True)
+            rec['바이트'] = len(matrix_html.encode('utf-8'))
         st.caption("※ 인덱스 가독성을 위해 두께를 복구했으며, 열 너비를 고정하여 간격을 최적화했습니다.")
 
         st.markdown("---")
@@ -437,27 +457,17 @@ try:
         st.subheader("🚀 실시간 시장 요약")
         m1, m2, m3, m4 = st.columns(4)
         m1.metric("엠버 최저가", f"{amber_min_val:,.0f}원" if amber_min_val > 0 else "데이터 없음")
-        m2.metric("시장 전체 최저가", f"{f_df['가격'].min():,.0f}원" if not f_df.empty else "0원")
-        m3.metric("시장 평균가", f"{f_df['가격'].mean():,.0f}원" if not f_df.empty else "0원")
-        m4.metric("활성 1위 채널", f_df['판매처'].value_counts().idxmax() if not f_df.empty else "없음")
-
-        # 2. 엠버 핵심 객실 히트맵
-        st.subheader("💎 엠버 핵심 객실별/채널별 최저가 분포 (Heatmap)")
-        if not amber_df.empty:
-            amber_pivot = amber_df.pivot_table(index='객실타입', columns='판매처', values='가격', aggfunc='min')
-            st.plotly_chart(px.imshow(amber_pivot, text_auto=',.0f', color_continuous_scale='RdYlGn_r', aspect="auto"), use_container_width=True)
-
-        # 3. 날짜별 전수 추적 그래프
-        st.subheader("📊 수집일 기준 가격 변동 추이 (일자별)")
-        for date in selected_dates:
-            d_df = f_df[f_df['날짜'] == date].copy()
-            if not d_df.empty:
-                # 같은 날 수집된 데이터는 최저가로 그룹화하여 일자별 추이 생성
-                daily_trend = d_df.groupby(['수집일', '호텔명'])['가격'].min().reset_index()
-                fig = px.line(daily_trend, x='수집일', y='가격', color='호텔명', markers=True, 
-                             title=f"📅 {date} 투숙일의 수집일별 가격 흐름")
-                fig.update_layout(xaxis_title="데이터 수집일", yaxis_title="최저가 (원)")
-                st.plotly_chart(fig, use_container_width=True)
+        m2.metric("시장 전체 최저가", f"{kpis['all_min']:,.0f}원" if not f_df.empty else "0원")
+        m3.metric("시장 평균가", f"{kpis['all_avg']:,.0f}원" if not f_df.empty else "0원")
+        m4.metric("활성 1위 채널", kpis['top_channel'] if not f_df.empty else "없음")
+
+        # 2. 엠버 핵심 객실 히트맵 (열었을 때만 계산)
+        with profiler.section("히트맵"):
+            render_heatmap_section(amber_df)
+
+        # 3. 날짜별 전수 추적 그래프 (열었을 때만 계산, 페이지 단위 렌더링)
+        with profiler.section("투숙일별 추이 그래프"):
+            render_trend_section(rollups, filters)
                 
         # 4. 시뮬레이터
         st.markdown("---")
@@ -465,18 +475,36 @@ try:
         if amber_min_val > 0:
             s1, s2 = st.columns([1, 2])
             with s1:
-                delta = st.slider("가격을 조정해보세요 (원)", -150000, 150000, 0, 5000)
+                delta = st.slider("가격을 조정해보세요 (원)", -SIM_DELTA_RANGE, SIM_DELTA_RANGE, 0, SIM_DELTA_STEP)
                 sim_p = amber_min_val + delta
                 st.write(f"📈 **조정 후 예상가: {sim_p:,.0f}원**")
-            comp_prices = comp_df['가격'].values
-            if len(comp_prices) > 0:
-                comb = np.append(comp_prices, sim_p); comb.sort()
-                rank = np.where(comb == sim_p)[0][0] + 1
-                st.write(f"🏆 예상 시장 순위: **{len(comb)}개 중 {rank}위**")
-                st.progress((len(comb) - rank + 1) / len(comb))
-
-        with st.expander("📋 상세 로그 보기"):
-            st.dataframe(f_df.sort_values(['날짜', '수집시간_dt'], ascending=[True, False]), use_container_width=True, hide_index=True)
+            if not comp_df.empty:
+                # 리포트에 미리 정렬된 경쟁가로 순위 조회 (슬라이더 조작마다 정렬하지 않음)
+                ranks, total = report.simulator.rank([sim_p])
+                rank = ranks[0]
+                st.write(f"🏆 예상 시장 순위: **{total}개 중 {rank}위**")
+                st.progress((total - rank + 1) / total)
+        with profiler.section("가격-순위 곡선"):
+            render_price_curve(report)
+
+        # 상세 로그 (열었을 때만 정렬, 한 페이지씩 전송)
+        with profiler.section("상세 로그"):
+            render_detail_log(f_df)
+        render_outlier_audit(snapshot.outlier_audit)
+
+    # 🛠️ 성능 계측 결과 패널 + JSONL 누적 기록
+    if profiler.enabled:
+        sync_stats = snapshot.sync_stats if snapshot is not None else {}
+        firestore_stats = {k: sync_stats.get(k) for k in ('누적 문서수', '마지막 조회')}
+        with st.expander("🛠️ 성능 계측 결과", expanded=True):
+            st.dataframe(pd.DataFrame(profiler.records), hide_index=True, use_container_width=True)
+            st.json({'firestore': firestore_stats, '정제 단계': sync_stats.get('정제 단계', [])})
+        try:
+            profiler.write_jsonl(firestore=firestore_stats, 정제단계=sync_stats.get('정제 단계', []))
+        except OSError as e:
+            st.caption(f"계측 로그 저장 실패: {e}")
 
+try:
+    main()
 except Exception as e:
     st.error(f"대시보드 에러 발생: {e}")
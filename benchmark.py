@@ -0,0 +1,195 @@
+# ------------------------------------------------------------------
+# 오프라인 벤치마크 (Streamlit 없이 실행)
+# - 가상 Hotel_Prices 문서를 생성해 메모리 가짜 Firestore 클라이언트(fake_firestore)로 적재
+# - 적재/정제/이상치/필터/파리티/땡처리/매트릭스/시뮬레이터/보존/집계 단계별 소요시간, 처리량, 피크 메모리 출력
+#
+# 사용법:
+#   python benchmark.py                         # 1만/10만/100만 행
+#   python benchmark.py --rows 100000 --save-baseline bench_baseline.json
+#   python benchmark.py --rows 100000 --baseline bench_baseline.json   # 1.5배 이상 느려지면 exit 1
+# ------------------------------------------------------------------
+import argparse
+import json
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from analytics import (PriceRollups, RankSimulator, apply_filters, build_min_matrix, collection_trends, compute_kpis,
+                       detect_dumping, find_parity_breaks, lead_time_trend, price_curve, render_min_matrix_html)
+from fake_firestore import InMemoryFirestore
+from normalize import EMBER_ROOM_CODES, EMBER_ROOM_GROUPS, normalize_prices
+from outliers import OutlierFilter
+from price_sync import PriceSync
+from profiling import Profiler
+from retention import RetentionPolicy
+
+HOTELS = ["엠버 퓨어힐", "그랜드하얏트", "파르나스", "신라호텔", "롯데호텔", "신라스테이", "해비치", "신화메리어트",
+          "히든클리프", "더시에나", "조선힐스위트", "메종글래드", "그랜드조선제주"]
+CHANNELS = ["아고다", "트립닷컴", "야놀자", "여기어때", "부킹닷컴", "익스피디아", "네이버"]
+EMBER_ROOMS = [kw for kws in EMBER_ROOM_GROUPS.values() for kw in kws]
+COMP_ROOMS = ["디럭스 더블", "디럭스 트윈", "프리미어 킹", "스탠다드 더블", "패밀리 트윈", "스위트", "Deluxe King", "Superior Twin"]
+
+
+# ------------------------------------------------------------------
+# 가상 데이터 생성
+# ------------------------------------------------------------------
+def generate_docs(n_rows, start=datetime(2024, 1, 1), days=120, seed=0):
+    """스크래퍼가 쌓는 형태의 원본 문서 프레임 (영문 필드명, 문자열 가격/시각 포함)"""
+    rng = np.random.default_rng(seed)
+    hotel = rng.integers(0, len(HOTELS), n_rows)
+    is_ember = hotel == 0
+    room = np.where(is_ember, np.array(EMBER_ROOMS, dtype=object)[rng.integers(0, len(EMBER_ROOMS), n_rows)],
+                    np.array(COMP_ROOMS, dtype=object)[rng.integers(0, len(COMP_ROOMS), n_rows)])
+    collected = pd.Timestamp(start) + pd.to_timedelta(np.sort(rng.integers(0, days * 86400, n_rows)), unit='s')
+    lead = rng.integers(0, 90, n_rows)
+    stay = (collected.normalize() + pd.to_timedelta(lead, unit='D')).strftime('%Y-%m-%d')
+    # 리드타임이 짧을수록 약간 싸지는 가격 + 호텔별 수준 차이, 일부는 깨진 값(0원/총액 파싱 오류)
+    base = 150000 + hotel * 12000 + lead * 800 + rng.normal(0, 25000, n_rows)
+    price = np.round(np.clip(base, 50000, None), -3)
+    broken = rng.random(n_rows)
+    price = np.where(broken < 0.002, 0, np.where(broken > 0.998, price * 7, price)).astype(np.int64)
+    price_text = pd.Series(price).map('{:,}원'.format)
+    return pd.DataFrame({
+        'hotel_name': np.array(HOTELS, dtype=object)[hotel],
+        'target_date': stay,
+        'room_name': room,
+        'channel': np.array(CHANNELS, dtype=object)[rng.integers(0, len(CHANNELS), n_rows)],
+        'price': np.where(rng.random(n_rows) < 0.5, price_text, price).astype(object),
+        'collected_at': collected.strftime('%Y-%m-%d %H:%M:%S'),
+    })
+
+
+# ------------------------------------------------------------------
+# 단계별 계측
+# ------------------------------------------------------------------
+def _run_stages(profiler, raw, seed, stay_dates):
+    db = InMemoryFirestore(raw.columns)
+    db.add(raw)
+
+    with profiler.section("load (전체 동기화)") as rec:
+        sync = PriceSync(db, normalize_prices, outliers=OutlierFilter())
+        df = sync.refresh()
+        rec['행수'] = len(df)
+    increment = generate_docs(max(1, len(raw) // 100), start=datetime(2024, 1, 1) + timedelta(days=120), days=1, seed=seed + 1)
+    db.add(increment)
+    with profiler.section("load (증분 1%)") as rec:
+        df = sync.refresh()
+        rec['행수'] = len(increment)
+    with profiler.section("normalize") as rec:
+        normalized = normalize_prices(raw)
+        rec['행수'] = len(raw)
+    with profiler.section("outliers (전체)") as rec:
+        OutlierFilter().split(normalized)
+        rec['행수'] = len(normalized)
+
+    dates = sorted(df['날짜'].unique())[-stay_dates:]
+    hotels = sorted(df['호텔명'].unique())
+    channels = sorted(df['판매처'].unique())
+    filters = (dates, hotels, channels, list(EMBER_ROOM_CODES.values()))
+    with profiler.section("filter") as rec:
+        f_df = apply_filters(df, *filters)
+        rec['행수'] = len(df)
+    amber_df = f_df[f_df['엠버여부']]
+    with profiler.section("parity") as rec:
+        find_parity_breaks(amber_df)
+        rec['행수'] = len(amber_df)
+    with profiler.section("kpi") as rec:
+        kpis = compute_kpis(f_df)
+        rec['행수'] = len(f_df)
+    with profiler.section("dumping (전 투숙일)") as rec:
+        detect_dumping(df, by=('호텔명', '날짜'))
+        rec['행수'] = len(df)
+    with profiler.section("matrix") as rec:
+        render_min_matrix_html(build_min_matrix(f_df, kpis['amber_min']))
+        rec['행수'] = len(f_df)
+    with profiler.section("simulator (가격 곡선)") as rec:
+        price_curve(amber_df, RankSimulator(f_df[~f_df['엠버여부']]))
+        rec['행수'] = len(f_df)
+    with profiler.section("retention (축약)") as rec:
+        RetentionPolicy(recent_days=14, max_days=60).apply(df)
+        rec['행수'] = len(df)
+    with profiler.section("rollup build") as rec:
+        rollups = PriceRollups()
+        rollups.update(df)
+        rec['행수'] = len(df)
+    new_rows = normalize_prices(increment)
+    with profiler.section("rollup merge (증분 1%)") as rec:
+        rollups.update(new_rows)
+        rec['행수'] = len(new_rows)
+    with profiler.section("trend (rollup)") as rec:
+        lead_time_trend(apply_filters(rollups.lead_time, *filters))
+        collection_trends(apply_filters(rollups.collection, *filters))
+        rec['행수'] = len(rollups.lead_time) + len(rollups.collection)
+    return profiler.records
+
+
+def run(n_rows, seed=0, stay_dates=30, memory=True):
+    """시간은 tracemalloc 없이 측정하고, 피크 메모리는 별도 패스로 측정해 합침"""
+    raw = generate_docs(n_rows, seed=seed)
+    records = _run_stages(Profiler(enabled=True, trace_memory=False), raw, seed, stay_dates)
+    peaks = {}
+    if memory:
+        peaks = {r['구간']: r['피크메모리(MB)'] for r in _run_stages(Profiler(enabled=True, trace_memory=True), raw, seed, stay_dates)}
+        # 다음 행수의 시간 측정 패스가 tracemalloc 오버헤드 없이 돌도록 (벤치마크 전용 프로세스라 끌 수 있음)
+        tracemalloc.stop()
+    for record in records:
+        seconds = record['소요시간(ms)'] / 1000
+        record['처리량(행/초)'] = round(record['행수'] / seconds) if seconds else None
+        record['피크메모리(MB)'] = peaks.get(record['구간'])
+    return records
+
+
+def print_table(n_rows, records):
+    print(f"\n=== {n_rows:,} rows ===")
+    print(f"{'stage':<22}{'ms':>12}{'rows':>12}{'rows/s':>14}{'peak MB':>10}")
+    for r in records:
+        rate = f"{r['처리량(행/초)']:,}" if r['처리량(행/초)'] else '-'
+        peak = f"{r['피크메모리(MB)']:,.1f}" if r['피크메모리(MB)'] is not None else '-'
+        print(f"{r['구간']:<22}{r['소요시간(ms)']:>12,.1f}{r['행수']:>12,}{rate:>14}{peak:>10}")
+
+
+def check_baseline(results, baseline, tolerance):
+    """기준 대비 tolerance 배 이상 느려진 단계 목록"""
+    slower = []
+    for n_rows, records in results.items():
+        base = {r['구간']: r['소요시간(ms)'] for r in baseline.get(str(n_rows), [])}
+        for r in records:
+            ref = base.get(r['구간'])
+            if ref and r['소요시간(ms)'] > ref * tolerance:
+                slower.append(f"{n_rows:,} rows / {r['구간']}: {ref:,.1f}ms -> {r['소요시간(ms)']:,.1f}ms")
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hotel_Prices 대시보드 오프라인 벤치마크")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stay-dates', type=int, default=30, help="필터에 선택할 최근 투숙일 수")
+    parser.add_argument('--no-memory', action='store_true', help="피크 메모리 측정 패스 생략")
+    parser.add_argument('--save-baseline', help="결과를 기준 파일(JSON)로 저장")
+    parser.add_argument('--baseline', help="기준 파일과 비교해 느려지면 exit 1")
+    parser.add_argument('--tolerance', type=float, default=1.5, help="허용 배수 (기본 1.5배)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for n_rows in args.rows:
+        results[n_rows] = run(n_rows, seed=args.seed, stay_dates=args.stay_dates, memory=not args.no_memory)
+        print_table(n_rows, results[n_rows])
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({str(k): v for k, v in results.items()}, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            slower = check_baseline(results, json.load(f), args.tolerance)
+        if slower:
+            print("\n[REGRESSION]\n" + "\n".join(slower))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
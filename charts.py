@@ -0,0 +1,107 @@
+# ------------------------------------------------------------------
+# 대시보드 Plotly 그림 생성 (Streamlit 비의존)
+# - 입력 집계 프레임의 해시 + 그림 옵션을 키로 프로세스 전역 LRU 캐시 -> 같은 집계면 그림을 다시 만들지 않음
+# - 점이 많은 그림은 WebGL(Scattergl) 로 렌더링
+# - 선택적으로 시리즈당 점 수를 LTTB 로 줄여 브라우저로 보내는 JSON 크기 제한
+# ------------------------------------------------------------------
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+FIGURE_CACHE_SIZE = 128
+# 그림 전체 점 수가 이 값을 넘으면 Scattergl 사용
+WEBGL_MIN_POINTS = 1000
+# 시리즈당 최대 점 수 (0 이면 축소 안 함)
+CHART_MAX_POINTS = int(os.environ.get("AMBER_CHART_MAX_POINTS", "500"))
+
+_figure_cache = OrderedDict()
+_figure_lock = threading.Lock()
+
+
+def frame_hash(frame):
+    """집계 프레임 내용 해시 (컬럼명 + 행 값, 인덱스 무시)"""
+    digest = hashlib.sha1(repr(list(frame.columns)).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _cached(key, build):
+    """그림 LRU 캐시 (반환된 그림은 수정하지 말 것 - 세션끼리 공유)"""
+    with _figure_lock:
+        if key in _figure_cache:
+            _figure_cache.move_to_end(key)
+            return _figure_cache[key]
+    fig = build()
+    with _figure_lock:
+        _figure_cache[key] = fig
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
+    return fig
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets 로 남길 점의 위치 (처음/끝 점 포함, x 는 정렬된 숫자 배열)"""
+    n = len(x)
+    if threshold < 3 or n <= threshold:
+        return np.arange(n)
+    every = (n - 2) / (threshold - 2)
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        # 이전 선택점 - 현재 구간 후보 - 다음 구간 평균점이 이루는 삼각형 넓이가 가장 큰 점 선택
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+def downsample_series(frame, x, y, color, max_points=CHART_MAX_POINTS):
+    """color 별 시리즈를 x 순으로 정렬해 max_points 개 이하로 축소 (숫자가 아닌 x 는 순서 위치로 간주)"""
+    if not max_points or frame.groupby(color, observed=True).size().max() <= max_points:
+        return frame
+    parts = []
+    for _, series in frame.groupby(color, observed=True, sort=False):
+        series = series.sort_values(x, kind='stable')
+        xs = series[x].to_numpy(dtype=float) if pd.api.types.is_numeric_dtype(series[x]) else np.arange(len(series), dtype=float)
+        parts.append(series.iloc[lttb(xs, series[y].to_numpy(dtype=float), max_points)])
+    return pd.concat(parts, ignore_index=True)
+
+
+def line_figure(frame, x, y, color, title, x_title=None, y_title=None, reverse_x=False, reverse_y=False,
+                hover_data=None, max_points=CHART_MAX_POINTS):
+    """시리즈별 꺾은선 그림 (점이 많으면 Scattergl, max_points 초과 시리즈는 LTTB 축소)"""
+    key = ('line', frame_hash(frame), x, y, color, title, x_title, y_title, reverse_x, reverse_y,
+           tuple(hover_data or ()), max_points)
+
+    def build():
+        data = downsample_series(frame, x, y, color, max_points)
+        render_mode = 'webgl' if len(data) > WEBGL_MIN_POINTS else 'svg'
+        fig = px.line(data, x=x, y=y, color=color, markers=True, hover_data=hover_data, title=title, render_mode=render_mode)
+        if reverse_x:
+            fig.update_xaxes(autorange="reversed")
+        if reverse_y:
+            fig.update_yaxes(autorange="reversed")
+        titles = {k: v for k, v in (('xaxis_title', x_title), ('yaxis_title', y_title)) if v}
+        if titles:
+            fig.update_layout(**titles)
+        return fig
+
+    return _cached(key, build)
+
+
+def heatmap_figure(pivot):
+    """피벗(행 x 열) 최저가 히트맵"""
+    def build():
+        return px.imshow(pivot, text_auto=',.0f', color_continuous_scale='RdYlGn_r', aspect="auto")
+
+    return _cached(('heatmap', frame_hash(pivot.reset_index()), pivot.index.name, pivot.columns.name), build)
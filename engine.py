@@ -0,0 +1,130 @@
+# ------------------------------------------------------------------
+# 대시보드 분석 엔진 진입점 (Streamlit 비의존)
+# - 적재(load) -> 정제(normalize) -> 필터 -> KPI/파리티/땡처리/최저가 매트릭스/시뮬레이터를
+#   하나의 리포트로 묶어 반환, 배치 작업/백그라운드 프로세스에서도 그대로 호출 가능
+# - 리포트는 (데이터 버전 + 필터 선택값) 해시로 프로세스 전역 LRU 캐시에 보관
+#   -> 같은 필터를 보는 여러 대시보드 세션이 결과를 공유
+# ------------------------------------------------------------------
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from analytics import (RankSimulator, apply_filters, build_min_matrix, compute_kpis, detect_dumping, filter_key,
+                       find_parity_breaks)
+from normalize import EMBER_ROOM_CODES, normalize_prices
+from outliers import OutlierFilter
+from price_sync import PriceSync
+from retention import RetentionPolicy
+
+# 사이드바 기본 선택 호텔 (엠버 + 비교 대상 12곳)
+TARGET_HOTELS = ["엠버퓨어힐", "그랜드하얏트", "파르나스", "신라호텔", "롯데호텔", "신라스테이", "해비치", "신화메리어트",
+                 "히든클리프", "더시에나", "조선힐스위트", "메종글래드", "그랜드조선제주"]
+REPORT_CACHE_SIZE = 64
+
+
+@dataclass(frozen=True)
+class Selection:
+    """사이드바 필터 선택값 (투숙일/호텔/채널/엠버 객실코드)"""
+    dates: tuple
+    hotels: tuple
+    channels: tuple
+    room_codes: tuple
+
+    @property
+    def filters(self):
+        return (list(self.dates), list(self.hotels), list(self.channels), list(self.room_codes))
+
+    def key(self, version):
+        return filter_key(version, *self.filters)
+
+
+@dataclass
+class Report:
+    selection: Selection
+    f_df: pd.DataFrame
+    amber_df: pd.DataFrame
+    comp_df: pd.DataFrame
+    kpis: dict
+    parity_breaks: pd.DataFrame
+    dumping: pd.DataFrame
+    matrix_cells: pd.DataFrame = field(repr=False)
+    # 가격 시뮬레이터 (경쟁가를 리포트 생성 시 한 번만 정렬)
+    simulator: RankSimulator = field(repr=False)
+
+
+def create_sync(db, store=None, retention=RetentionPolicy()):
+    """Firestore 증분 동기화 + 정제 파이프라인 (+ 선택적 Parquet 저장소, 보존 정책, 이상치 필터)"""
+    return PriceSync(db, normalize_prices, store=store, retention=retention, outliers=OutlierFilter())
+
+
+def load(sync):
+    """신규 문서만 동기화한 전체 정제 프레임"""
+    return sync.refresh()
+
+
+def data_version(df):
+    """스냅샷 버전 (append-only 이므로 행수 + 최신 수집시각으로 식별)"""
+    return (len(df), df['수집시간_dt'].max() if not df.empty else None)
+
+
+def default_selection(df):
+    """대시보드 첫 화면과 동일한 기본 필터 (최신 투숙일, 대상 호텔, 전 채널, 전 객실)"""
+    all_dates = sorted(df['날짜'].unique())
+    hotels = set(df['호텔명'].unique())
+    return Selection(
+        dates=tuple(all_dates[-1:]),
+        hotels=tuple(h for h in TARGET_HOTELS if h in hotels),
+        channels=tuple(sorted(df['판매처'].unique())),
+        room_codes=tuple(EMBER_ROOM_CODES.values()),
+    )
+
+
+def build_report(df, selection):
+    f_df = apply_filters(df, *selection.filters)
+    amber_df = f_df[f_df['엠버여부']]
+    comp_df = f_df[~f_df['엠버여부']]
+    kpis = compute_kpis(f_df)
+    return Report(
+        selection=selection,
+        f_df=f_df,
+        amber_df=amber_df,
+        comp_df=comp_df,
+        kpis=kpis,
+        parity_breaks=find_parity_breaks(amber_df),
+        dumping=detect_dumping(f_df),
+        matrix_cells=build_min_matrix(f_df, kpis['amber_min']),
+        simulator=RankSimulator(comp_df),
+    )
+
+
+_report_cache = OrderedDict()
+_report_lock = threading.Lock()
+# 캐시에 들어 있는 리포트들의 데이터 버전
+_report_version = None
+
+
+def get_report(df, selection):
+    """build_report 의 프로세스 전역 LRU 캐시 버전 (리포트는 읽기 전용으로 사용)"""
+    global _report_version
+    version = data_version(df)
+    key = selection.key(version)
+    with _report_lock:
+        # 데이터 버전이 바뀌면 이전 버전 리포트는 다시 쓰일 일이 없으므로 바로 비움
+        # (리포트마다 필터 프레임 사본을 들고 있어 LRU 밀려남을 기다리면 메모리가 쌓임)
+        if version != _report_version:
+            _report_cache.clear()
+            _report_version = version
+        if key in _report_cache:
+            _report_cache.move_to_end(key)
+            return _report_cache[key]
+    report = build_report(df, selection)
+    with _report_lock:
+        if version != _report_version:
+            # 계산 도중 새 버전이 들어왔으면 지난 버전 리포트는 캐시하지 않음
+            return report
+        _report_cache[key] = report
+        while len(_report_cache) > REPORT_CACHE_SIZE:
+            _report_cache.popitem(last=False)
+    return report
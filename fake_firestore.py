@@ -0,0 +1,81 @@
+# ------------------------------------------------------------------
+# 메모리 가짜 Firestore 클라이언트 (collection/where/order_by/select/limit/stream 만 지원)
+# - 벤치마크와 테스트에서 실제 Firestore 없이 PriceSync 를 돌리기 위한 용도
+# - 문서를 튜플 행으로 보관해 100만 건도 dict 없이 메모리에 올림
+# ------------------------------------------------------------------
+import operator
+
+_OPS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le, '==': operator.eq}
+
+
+class _Doc:
+    __slots__ = ('id', '_fields', '_values')
+
+    def __init__(self, doc_id, fields, values):
+        self.id = doc_id
+        self._fields = fields
+        self._values = values
+
+    def to_dict(self):
+        return dict(zip(self._fields, self._values))
+
+
+class _Query:
+    def __init__(self, store, filters=(), fields=None, count=None, order=None):
+        self._store = store
+        self._filters = filters
+        self._fields = fields
+        self._count = count
+        self._order = order
+
+    def where(self, field, op, value):
+        return _Query(self._store, self._filters + ((field, _OPS[op], value),), self._fields, self._count, self._order)
+
+    def order_by(self, field, direction="ASCENDING"):
+        return _Query(self._store, self._filters, self._fields, self._count, (field, direction == "DESCENDING"))
+
+    def select(self, fields):
+        return _Query(self._store, self._filters, list(fields), self._count, self._order)
+
+    def limit(self, count):
+        return _Query(self._store, self._filters, self._fields, count, self._order)
+
+    def _rows(self):
+        rows = zip(self._store.ids, self._store.rows)
+        if self._order is None:
+            return rows
+        field, descending = self._order
+        i = self._store.columns.index(field)
+        # Firestore 타입 순서처럼 Timestamp 가 문자열보다 앞
+        return sorted(rows, key=lambda item: (isinstance(item[1][i], str), item[1][i]), reverse=descending)
+
+    def stream(self):
+        columns = self._store.columns
+        picks = [columns.index(f) for f in (self._fields or columns)]
+        names = [columns[i] for i in picks]
+        checks = [(columns.index(f), op, v) for f, op, v in self._filters]
+        found = 0
+        for doc_id, values in self._rows():
+            if self._count is not None and found >= self._count:
+                return
+            # Firestore 처럼 타입이 다른 값은 비교 조건에 걸리지 않음
+            if all(isinstance(values[i], str) == isinstance(v, str) and op(values[i], v) for i, op, v in checks):
+                found += 1
+                yield _Doc(doc_id, names, [values[i] for i in picks])
+
+
+class InMemoryFirestore:
+    """문서를 튜플 행으로 보관해 100만 건도 dict 없이 메모리에 올림"""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.ids = []
+        self.rows = []
+
+    def add(self, frame):
+        start = len(self.ids)
+        self.ids.extend(f"doc{start + i}" for i in range(len(frame)))
+        self.rows.extend(frame[self.columns].itertuples(index=False, name=None))
+
+    def collection(self, name):
+        return _Query(self)
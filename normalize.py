@@ -0,0 +1,201 @@
+# ------------------------------------------------------------------
+# Hotel_Prices 정제(normalization) 파이프라인
+# - 호텔명/판매처/객실타입은 카테고리(categorical)로 보관 -> 문자열 객체 수를 고유값 수로 축소
+# - 문자열 정제와 날짜 파싱은 행 전체가 아니라 고유값에만 한 번씩 수행 후 코드로 펼침
+# - 날짜는 명시적 포맷으로 파싱 (포맷이 다른 값만 ISO8601 로 재시도)
+# ------------------------------------------------------------------
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Firebase 컬럼(영어) -> 지배인님 기존 코드 컬럼(한글)
+COLUMN_MAP = {
+    'hotel_name': '호텔명',
+    'target_date': '날짜',
+    'room_name': '객실타입',
+    'channel': '판매처',
+    'price': '가격',
+    'collected_at': '수집시간'
+}
+CATEGORY_COLUMNS = ['호텔명', '판매처', '객실타입']
+
+STAY_DATE_FORMAT = '%Y-%m-%d'
+COLLECTED_AT_FORMAT = '%Y-%m-%d %H:%M:%S'
+LOCAL_TZ = 'Asia/Seoul'
+# 명백한 파싱 오류 상한 (이상치 판정은 outliers.OutlierFilter 에서 수행, 여기서는 걸러내지 않음)
+PRICE_CAP = 1500000
+
+# 🚀 엠버 10대 객실 코드별 객실명 키워드 (사이드바 라벨 -> 키워드)
+EMBER_ROOM_GROUPS = {
+    "GDB (디럭스 더블)": ["그린밸리 디럭스 더블", "Green Valley Deluxe Double"],
+    "GDF (디럭스 패밀리)": ["그린밸리 디럭스 패밀리", "Green Valley Deluxe Family"],
+    "FDB (가든 더블)": ["포레스트 가든 더블", "Forest Garden Double"],
+    "FDE (가든 더블 EB)": ["포레스트 가든 더블 EB", "Forest Garden Double EB"],
+    "FDF (플로라 더블)": ["포레스트 플로라 더블", "포레스트 플로랄 더블", "Forest Flora Double", "Forest Floral Double"],
+    "FPT (펫 더블)": ["포레스트 펫 더블", "Forest Pet Double"],
+    "HDP (힐 파인 더블)": ["힐 파인 더블", "Hill Pine Double"],
+    "HDT (힐 엠버 트윈)": ["힐 엠버 트윈", "Hill Amber Twin"],
+    "HDF (힐 루나 패밀리)": ["힐 루나 패밀리", "Hill Luna Family"],
+    "PPV (풀빌라)": ["프라이빗 풀 빌라", "프라이빗 풀빌라", "Forest Private Pool Villa"]
+}
+# 사이드바 라벨 -> 객실코드 (예: "GDB (디럭스 더블)" -> "GDB")
+EMBER_ROOM_CODES = {label: label.split(" ")[0] for label in EMBER_ROOM_GROUPS}
+# 긴 키워드부터 매칭 -> "가든 더블 EB" 가 "가든 더블"(FDB)로 잘못 묶이지 않음
+_ROOM_KEYWORDS = sorted(((kw, EMBER_ROOM_CODES[label]) for label, kws in EMBER_ROOM_GROUPS.items() for kw in kws),
+                        key=lambda item: len(item[0]), reverse=True)
+
+
+class StepReport:
+    """정제 단계별 소요시간/행수/메모리 기록 (report 를 넘긴 경우에만 메모리 측정)"""
+
+    def __init__(self, report):
+        self.report = report
+        self._t0 = time.perf_counter()
+
+    def mark(self, step, frame):
+        if self.report is None:
+            return
+        now = time.perf_counter()
+        self.report.append({
+            '단계': step,
+            '소요시간(ms)': round((now - self._t0) * 1000, 2),
+            '행수': len(frame),
+            '메모리(MB)': round(frame.memory_usage(deep=True).sum() / 1024 ** 2, 2),
+        })
+        self._t0 = time.perf_counter()
+
+
+def merge_step_reports(reports):
+    """청크별 정제 리포트를 단계별 합계(소요시간/행수/메모리)로 합침"""
+    merged = {}
+    for report in reports:
+        for row in report:
+            total = merged.setdefault(row['단계'], {'단계': row['단계'], '소요시간(ms)': 0.0, '행수': 0, '메모리(MB)': 0.0})
+            for key in ('소요시간(ms)', '행수', '메모리(MB)'):
+                total[key] += row[key]
+    return [{**row, '소요시간(ms)': round(float(row['소요시간(ms)']), 2), '메모리(MB)': round(float(row['메모리(MB)']), 2)}
+            for row in merged.values()]
+
+
+def _factorize_clean(series, clean):
+    """고유값에만 정제 함수를 적용 -> (행별 코드, 정제된 고유값) 반환"""
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    # astype(str) 동작 유지: 결측도 'nan'/'None' 문자열로 남음
+    cleaned = clean(pd.Series([str(u) for u in uniques], dtype=object))
+    cleaned_codes, categories = pd.factorize(cleaned)
+    return cleaned_codes[codes], pd.Index(categories, dtype=object)
+
+
+def _clean_uniques(series, clean):
+    codes, categories = _factorize_clean(series, clean)
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def _parse_datetime(series, fmt):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    parsed = pd.to_datetime(series, format=fmt, errors='coerce')
+    retry = parsed.isna() & series.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(series[retry], format='ISO8601', errors='coerce')
+    return parsed
+
+
+def _parse_price(series):
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    price = pd.to_numeric(series, errors='coerce')
+    # 쉼표/'원' 이 섞인 값만 문자열 정제 (숫자로 바로 변환된 값은 건드리지 않음)
+    retry = price.isna() & series.notna()
+    if retry.any():
+        stripped = series[retry].astype(str).str.replace(',', '').str.replace('원', '')
+        price[retry] = pd.to_numeric(stripped, errors='coerce')
+    return price
+
+
+def room_code_of(room_name):
+    """객실명에 포함된 키워드로 엠버 객실코드 판별 (정규식이 아닌 단순 포함 검사)"""
+    for keyword, code in _ROOM_KEYWORDS:
+        if keyword in room_name:
+            return code
+    return None
+
+
+def add_room_codes(data):
+    """엠버여부/객실코드 컬럼을 카테고리 고유값 기준으로 한 번만 계산해 추가"""
+    hotels = data['호텔명'].astype('category').cat
+    hotel_is_ember = pd.Series(hotels.categories, dtype=object).str.contains("엠버", regex=False).to_numpy(dtype=bool)
+    is_ember = (hotels.codes >= 0).to_numpy() & hotel_is_ember[hotels.codes.to_numpy()]
+
+    rooms = data['객실타입'].astype('category').cat
+    code_labels = list(EMBER_ROOM_CODES.values())
+    room_to_code = pd.Categorical([room_code_of(name) for name in rooms.categories], categories=code_labels).codes
+    room_idx = rooms.codes.to_numpy()
+    # 결측 객실명(-1)과 타 호텔 객실은 코드 없음(-1 -> NaN)
+    row_codes = np.where((room_idx >= 0) & is_ember, room_to_code[room_idx], -1)
+
+    data['엠버여부'] = is_ember
+    data['객실코드'] = pd.Categorical.from_codes(row_codes, categories=code_labels)
+    return data
+
+
+def normalize_prices(raw, report=None):
+    """Firestore 원본 프레임을 대시보드용 정제 프레임으로 변환"""
+    steps = StepReport(report)
+    data = raw.rename(columns=COLUMN_MAP)
+    steps.mark('컬럼 매핑', data)
+
+    # 1) 필터에 필요한 가격/수집시간만 먼저 계산 -> 탈락 행은 이후 단계에서 제외 (dropna 1회)
+    price = _parse_price(data['가격'])
+    collected = _parse_datetime(data['수집시간'], COLLECTED_AT_FORMAT)
+    if getattr(collected.dt, 'tz', None) is not None:
+        # Firestore Timestamp(UTC) 는 한국 시각 기준 naive 로 맞춤 (투숙일/수집일 계산과 동일 기준)
+        collected = collected.dt.tz_convert(LOCAL_TZ).dt.tz_localize(None)
+    keep = price.notna() & collected.notna()
+    data = data.loc[keep].copy()
+    data['가격'] = price[keep]
+    data['수집시간_dt'] = collected[keep]
+    steps.mark('가격/수집시간 파싱 및 필터', data)
+
+    # 2) 문자열 컬럼 -> 카테고리 (공백 제거는 고유값에만)
+    data['호텔명'] = _clean_uniques(data['호텔명'], lambda s: s.str.replace(" ", "").str.strip())
+    data['객실타입'] = _clean_uniques(data['객실타입'], lambda s: s.str.strip())
+    data['판매처'] = _clean_uniques(data['판매처'], lambda s: s.str.strip())
+    steps.mark('카테고리 변환', data)
+
+    # 3) 투숙일/수집일/리드타임 일괄 계산 (날짜 문자열 파싱도 고유값 기준)
+    date_codes, date_uniques = _factorize_clean(data['날짜'], lambda s: s.str.replace(" ", "").str.strip())
+    stay_dates = _parse_datetime(pd.Series(date_uniques), STAY_DATE_FORMAT)
+    data['날짜'] = date_uniques.to_numpy()[date_codes]
+    data['투숙일_dt'] = stay_dates.to_numpy()[date_codes]
+    day_codes, day_uniques = pd.factorize(data['수집시간_dt'].dt.floor('D'))
+    data['수집일'] = pd.Index(day_uniques).strftime('%Y-%m-%d').to_numpy()[day_codes]
+    data['리드타임'] = (data['투숙일_dt'] - data['수집시간_dt']).dt.days
+    steps.mark('투숙일/수집일/리드타임 계산', data)
+
+    # 4) 엠버 객실코드 인덱스 (사이드바 객실 필터는 이 코드에 대한 isin 으로 처리)
+    data = add_room_codes(data)
+    steps.mark('객실코드 매핑', data)
+    return data
+
+
+def _object_categorical(series):
+    # Parquet 에서 읽은 카테고리는 문자열 dtype 이라 범주 dtype 을 object 로 통일
+    cat = series.astype('category').cat
+    return pd.Categorical.from_codes(cat.codes, categories=pd.Index(cat.categories, dtype=object))
+
+
+def concat_prices(frames):
+    """정제 프레임 이어붙이기 (카테고리가 object 로 풀리지 않도록 범주 합집합 유지)"""
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    out = pd.concat(frames, ignore_index=True)
+    for col in CATEGORY_COLUMNS:
+        if col in out.columns and not isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = union_categoricals([_object_categorical(f[col]) for f in frames], ignore_order=True)
+    return out
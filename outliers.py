@@ -0,0 +1,151 @@
+# ------------------------------------------------------------------
+# 가격 이상치 필터 (고정 상한 대신 그룹별 로버스트 통계)
+# - 0원 이하/상한(PRICE_CAP) 이상은 확정 오류 -> 영구 제외
+# - 나머지는 (호텔명, 객실타입, 판매처, 주말 투숙 여부) 그룹마다 최근 가격 WINDOW 개의 중앙값/MAD 로
+#   로버스트 z 점수를 계산해 튀는 값은 '보류' (집계에서 잠시 제외)
+# - 보류된 값도 그룹 창에는 들어가므로 실제 가격 수준이 바뀌면(성수기 등) 창의 중앙값이 따라 움직이고,
+#   매 갱신마다 보류 행을 다시 판정해 더 이상 튀지 않으면 복원 -> 진짜 가격 변화를 영구히 버리지 않음
+# - 신규 수집분과 보류 행만 판정하고 그룹별 창만 갱신 -> 갱신 비용이 누적 행수와 무관
+# - 감사(audit) 테이블 = 현재 집계에서 빠져 있는 행 (확정 오류 최근 AUDIT_SIZE 건 + 보류 행)
+#   보류 행이 AUDIT_SIZE 를 넘으면 오래된 행부터 '보류 만료' 로 확정 오류 쪽에 옮김 (조용히 사라지지 않음)
+# ------------------------------------------------------------------
+import os
+
+import numpy as np
+import pandas as pd
+
+from normalize import PRICE_CAP, concat_prices
+
+OUTLIER_KEYS = ['호텔명', '객실타입', '판매처']
+# 그룹 키에 추가하는 투숙 요일 구분 (금/토 투숙은 평일과 요금 수준이 달라 따로 판정)
+WEEKEND_KEY = '주말'
+WEEKEND_DAYS = [4, 5]
+# 그룹별로 기억하는 최근 가격 개수
+OUTLIER_WINDOW = int(os.environ.get("AMBER_OUTLIER_WINDOW", "50"))
+# 로버스트 z 점수(|가격 - 중앙값| / (1.4826 x MAD)) 가 이 값을 넘으면 보류
+OUTLIER_THRESHOLD = float(os.environ.get("AMBER_OUTLIER_THRESHOLD", "5"))
+# 표본이 이보다 적은 그룹은 점수로 판정하지 않음 (0원/상한 초과만 제외)
+OUTLIER_MIN_POINTS = 5
+# 가격이 모두 같은 그룹(MAD=0)에서 몇 천원 차이로 걸리지 않도록 척도 하한 = 중앙값의 5%
+OUTLIER_MIN_SCALE = 0.05
+# 확정 오류/보류 행 각각 최대 보관 건수
+OUTLIER_AUDIT_SIZE = 5000
+AUDIT_COLUMNS = ['기준중앙값', '이상치점수', '사유']
+
+
+def _keyed(frame):
+    """그룹 키 + 가격 (주말 투숙 여부는 투숙일에서 계산)"""
+    keyed = frame[OUTLIER_KEYS + ['가격']].copy()
+    keyed[WEEKEND_KEY] = frame['투숙일_dt'].dt.dayofweek.isin(WEEKEND_DAYS).to_numpy()
+    return keyed
+
+
+def _group_keys(frame):
+    return [frame[k] for k in OUTLIER_KEYS + [WEEKEND_KEY]]
+
+
+def _robust_score(price, median, mad, count, threshold):
+    """(점수, 점수 기준 이상 여부) - 표본이 적은 그룹은 이상으로 보지 않음"""
+    scale = np.maximum(1.4826 * mad, OUTLIER_MIN_SCALE * np.abs(median))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = np.abs(price - median) / scale
+    return score, (count >= OUTLIER_MIN_POINTS) & (score > threshold)
+
+
+class OutlierFilter:
+    def __init__(self, window=OUTLIER_WINDOW, threshold=OUTLIER_THRESHOLD, audit_size=OUTLIER_AUDIT_SIZE):
+        self.window = window
+        self.threshold = threshold
+        self.audit_size = audit_size
+        # 그룹별 최근 가격 (확정 오류 제외, 보류 행 포함)
+        self.history = pd.DataFrame()
+        # 확정 오류(0원/상한 초과) 최근 행과 복원 대기 중인 보류 행
+        self.rejected = pd.DataFrame()
+        self.pending = pd.DataFrame()
+        # 누적 제외(확정 + 보류) 건수 / 보류 후 복원 건수
+        self.flagged_total = 0
+        self.released_total = 0
+
+    @property
+    def audit(self):
+        """현재 집계에서 빠져 있는 행 (사유/기준중앙값/점수 포함)"""
+        return concat_prices([self.rejected, self.pending])
+
+    def _reject(self, rows):
+        self.rejected = concat_prices([self.rejected, rows]).tail(self.audit_size).reset_index(drop=True)
+
+    def _hold(self, rows):
+        """보류 행 추가 - 보관 한도를 넘는 오래된 보류 행은 복원을 포기하고 '보류 만료' 로 확정 오류에 옮김"""
+        pending = concat_prices([self.pending, rows])
+        overflow = len(pending) - self.audit_size
+        if overflow > 0:
+            self._reject(pending.iloc[:overflow].assign(사유='보류 만료'))
+            pending = pending.iloc[overflow:]
+        self.pending = pending.reset_index(drop=True)
+
+    def _remember(self, keyed):
+        recent = concat_prices([self.history, keyed])
+        self.history = recent.groupby(OUTLIER_KEYS + [WEEKEND_KEY], observed=True, sort=False).tail(self.window).reset_index(drop=True)
+
+    def seed(self, frame):
+        """저장소에서 복원한 프레임으로 그룹별 창만 채움"""
+        if not frame.empty:
+            self._remember(_keyed(frame))
+
+    def _recheck_pending(self):
+        """갱신된 창 기준으로 보류 행을 다시 판정해 더 이상 튀지 않는 행을 복원 (원본 컬럼만 반환)"""
+        if self.pending.empty or self.history.empty:
+            return pd.DataFrame()
+        keys = OUTLIER_KEYS + [WEEKEND_KEY]
+        price = self.history['가격']
+        median = price.groupby(_group_keys(self.history), observed=True).transform('median')
+        stats = (self.history[keys].assign(중앙값=median, 편차=(price - median).abs())
+                 .groupby(keys, observed=True).agg(중앙값=('중앙값', 'first'), MAD=('편차', 'median'), 표본수=('편차', 'size')))
+        # 카테고리 범주가 서로 달라도 맞춰지도록 object 키로 조회
+        stats.index = pd.MultiIndex.from_frame(stats.index.to_frame(index=False).astype(object))
+        lookup = pd.MultiIndex.from_frame(_keyed(self.pending)[keys].astype(object))
+        matched = stats.reindex(lookup)
+        _, still = _robust_score(self.pending['가격'].to_numpy(dtype=float), matched['중앙값'].to_numpy(),
+                                 matched['MAD'].to_numpy(), matched['표본수'].fillna(0).to_numpy(), self.threshold)
+        # 창에서 그룹이 사라진 경우(NaN)는 계속 보류
+        still |= matched['중앙값'].isna().to_numpy()
+        released = self.pending[~still].drop(columns=AUDIT_COLUMNS)
+        self.pending = self.pending[still].reset_index(drop=True)
+        self.released_total += len(released)
+        return released
+
+    def split(self, new_frame):
+        """신규 정제 행을 판정해 집계에 넣을 행(정상 + 복원된 보류 행)을 반환 (제외 행은 audit 에 보관)"""
+        if new_frame.empty:
+            return new_frame
+        p = new_frame['가격'].to_numpy(dtype=float)
+        hard = np.select([p <= 0, p >= PRICE_CAP], ['0원 이하', '상한 초과'], '')
+        is_hard = hard != ''
+        if is_hard.any():
+            self._reject(new_frame[is_hard].assign(기준중앙값=np.nan, 이상치점수=np.nan, 사유=hard[is_hard]))
+            self.flagged_total += int(is_hard.sum())
+
+        candidates = new_frame[~is_hard]
+        if candidates.empty:
+            # 전부 확정 오류면 판정할 행이 없음 (창이 그대로라 보류 행 재판정도 불필요)
+            return candidates
+        keyed = _keyed(candidates)
+        # 기준 = 그룹별 최근 창 + 이번 신규분 (처음 보는 그룹/첫 전체 적재도 신규분 자체로 판정)
+        ref = concat_prices([self.history, keyed])
+        keys = _group_keys(ref)
+        price = ref['가격']
+        median = price.groupby(keys, observed=True).transform('median')
+        mad = (price - median).abs().groupby(keys, observed=True).transform('median')
+        count = price.groupby(keys, observed=True).transform('size')
+        tail = slice(len(ref) - len(candidates), None)
+        median = median.to_numpy()[tail]
+        score, suspect = _robust_score(keyed['가격'].to_numpy(dtype=float), median, mad.to_numpy()[tail],
+                                       count.to_numpy()[tail], self.threshold)
+
+        # 보류 행도 창에 넣어야 가격 수준이 실제로 바뀌었을 때 중앙값이 따라옴
+        self._remember(keyed)
+        released = self._recheck_pending()
+        if suspect.any():
+            self._hold(candidates[suspect].assign(기준중앙값=median[suspect], 이상치점수=np.round(score[suspect], 2), 사유='중앙값 이탈'))
+            self.flagged_total += int(suspect.sum())
+        return concat_prices([candidates[~suspect], released])
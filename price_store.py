@@ -0,0 +1,59 @@
+# ------------------------------------------------------------------
+# 정제된 Hotel_Prices 프레임의 로컬 Parquet 저장소 (수집일 파티션)
+# - 프로세스 재시작 시 Firestore 전체를 다시 읽지 않고 디스크에서 메모리 맵으로 복원
+# - 파티션 경로: <root>/수집일=YYYY-MM-DD/part.parquet
+# ------------------------------------------------------------------
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from normalize import concat_prices
+
+DEFAULT_ROOT = os.environ.get("PRICE_STORE_DIR", ".price_store")
+PARTITION_KEY = "수집일"
+
+# 저장 대상 컬럼 (Firestore 문서의 기타 필드는 저장하지 않음)
+# (최고가/평균가/표준편차/집계건수는 보존 정책으로 일 단위 축약된 행에만 값이 있음)
+STORE_COLUMNS = ['doc_id', '호텔명', '날짜', '객실타입', '판매처', '가격',
+                 '수집시간', '수집시간_dt', '수집일', '투숙일_dt', '리드타임', '최고가', '평균가', '표준편차', '집계건수']
+
+
+class PriceStore:
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+
+    def _partition_path(self, day):
+        return os.path.join(self.root, f"{PARTITION_KEY}={day}", "part.parquet")
+
+    def partitions(self):
+        if not os.path.isdir(self.root):
+            return []
+        prefix = f"{PARTITION_KEY}="
+        days = [name[len(prefix):] for name in os.listdir(self.root) if name.startswith(prefix)]
+        return sorted(d for d in days if os.path.exists(self._partition_path(d)))
+
+    def load(self):
+        """저장된 모든 파티션을 메모리 맵으로 읽어 하나의 프레임으로 반환"""
+        frames = [pq.read_table(self._partition_path(day), memory_map=True).to_pandas()
+                  for day in self.partitions()]
+        return concat_prices(frames)
+
+    def write(self, frame, days):
+        """지정한 수집일 파티션을 frame 기준으로 통째로 다시 씀 (임시파일 후 원자적 교체)"""
+        cols = [c for c in STORE_COLUMNS if c in frame.columns]
+        part_frame = frame.loc[frame[PARTITION_KEY].isin(list(days)), cols]
+        for day, part in part_frame.groupby(PARTITION_KEY, sort=False, observed=True):
+            path = self._partition_path(day)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            pq.write_table(pa.Table.from_pandas(part, preserve_index=False), tmp_path)
+            os.replace(tmp_path, path)
+
+    def remove(self, days):
+        """보존 기간이 지난 수집일 파티션 삭제"""
+        for day in days:
+            path = self._partition_path(day)
+            if os.path.exists(path):
+                os.remove(path)
+                os.rmdir(os.path.dirname(path))
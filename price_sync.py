@@ -0,0 +1,213 @@
+# ------------------------------------------------------------------
+# Hotel_Prices 증분 동기화 레이어
+# - 매 갱신마다 컬렉션 전체를 stream() 하지 않고,
+#   마지막으로 본 collected_at(워터마크) 이후 문서만 가져와 로컬 스냅샷에 덧붙임
+# - db 는 collection().where()/order_by()/limit().stream() 만 있으면 되므로
+#   Firestore 에뮬레이터(FIRESTORE_EMULATOR_HOST)나 메모리 가짜 클라이언트로도 동작
+# - store(PriceStore)가 주어지면 디스크 스냅샷에서 시작해 빠진 수집일 파티션만 조회
+# - retention(RetentionPolicy)이 주어지면 수집일이 바뀔 때마다 오래된 수집분을 축약/삭제
+# - outliers(OutlierFilter)가 주어지면 신규 행 중 그룹별 이상치를 집계 전에 제외 (감사 테이블에 보관)
+# - 문서는 필요한 6개 필드만 select() 로 받아 chunk_size 단위 컬럼 버퍼로 모은 뒤 청크별로 정제
+#   -> dict 리스트 전체와 정제 프레임이 동시에 메모리에 올라가지 않음
+# ------------------------------------------------------------------
+import os
+import threading
+import time
+
+import pandas as pd
+
+from analytics import PriceRollups
+from normalize import COLUMN_MAP, LOCAL_TZ, add_room_codes, concat_prices, merge_step_reports
+
+COLLECTION = "Hotel_Prices"
+WATERMARK_FIELD = "collected_at"
+# google.cloud.firestore.Query.DESCENDING 과 같은 값 (firebase 패키지 import 없이 사용)
+DESCENDING = "DESCENDING"
+# Firestore projection 필드 (정제에 쓰는 원본 필드만)
+SOURCE_FIELDS = list(COLUMN_MAP)
+INGEST_CHUNK_SIZE = int(os.environ.get("AMBER_INGEST_CHUNK_SIZE", "50000"))
+
+
+class PriceSync:
+    def __init__(self, db, transform, collection=COLLECTION, store=None, retention=None, outliers=None,
+                 chunk_size=INGEST_CHUNK_SIZE):
+        self.db = db
+        # transform(raw, report): 원본 DataFrame -> 정제된 DataFrame (행 단위 정제만 허용)
+        self.transform = transform
+        # 마지막 갱신의 정제 단계별 소요시간/메모리 기록
+        self.last_report = []
+        self.collection = collection
+        self.frame = pd.DataFrame()
+        self.watermark = None
+        # 워터마크와 같은 collected_at 을 가진 문서 id (>= 재조회 시 중복 방지용)
+        self._edge_ids = set()
+        self.docs_read = 0
+        # 마지막 갱신의 Firestore 조회 통계 (문서 수/대략 바이트/정제 후 행수/소요시간)
+        self.last_pull = {}
+        # 추이 차트용 사전 집계 (스냅샷과 함께 증분 갱신)
+        self.rollups = PriceRollups()
+        self.store = store
+        self._seeded = store is None
+        self.retention = retention
+        self.outliers = outliers
+        self.chunk_size = chunk_size
+        # 마지막으로 보존 정책을 적용한 기준 수집일 (새 수집일이 생길 때만 다시 적용)
+        self._retention_day = None
+        self._lock = threading.Lock()
+
+    def _seed_from_store(self):
+        try:
+            frame = self.store.load()
+        except Exception:
+            # 손상된 저장소는 무시하고 Firestore 전체 조회로 복구
+            frame = pd.DataFrame()
+        if frame.empty or 'doc_id' not in frame.columns:
+            return
+        # 객실코드 인덱스는 저장하지 않고 복원 시 다시 계산 (키워드 변경 즉시 반영)
+        self.frame = add_room_codes(frame)
+        self.rollups.update(self.frame)
+        # 마지막 수집일은 수집 도중 저장됐을 수 있으므로 그 날 0시부터 다시 조회하고,
+        # 이미 가진 문서는 id 로 건너뜀 -> 실제로는 빠진 파티션만 읽게 됨
+        last_day = frame['수집일'].max()
+        raw_stamps = frame['수집시간']
+        if pd.api.types.is_datetime64_any_dtype(raw_stamps) and raw_stamps.dt.tz is not None:
+            # 수집일은 한국 시각 날짜 (normalize 의 tz 변환) -> 그 날 한국 시각 0시를 원본 tz 로
+            self.watermark = pd.Timestamp(last_day, tz=LOCAL_TZ).tz_convert(raw_stamps.dt.tz).to_pydatetime()
+        elif pd.api.types.is_datetime64_any_dtype(raw_stamps):
+            self.watermark = pd.Timestamp(last_day).to_pydatetime()
+        else:
+            self.watermark = last_day
+        self._edge_ids = set(frame.loc[frame['수집일'] == last_day, 'doc_id'])
+
+    def _persist(self, new_frame):
+        if self.store is None or new_frame.empty:
+            return
+        try:
+            self.store.write(self.frame, new_frame['수집일'].unique())
+        except OSError:
+            # 디스크 캐시는 보조 수단이므로 쓰기 실패가 갱신을 막지 않게 함
+            pass
+
+    def _apply_retention(self):
+        if self.retention is None or self.frame.empty:
+            return
+        latest = self.frame['수집일'].max()
+        if latest == self._retention_day:
+            return
+        self.frame, compacted, dropped = self.retention.apply(self.frame)
+        self._retention_day = latest
+        if dropped:
+            self.rollups.prune(self.retention.drop_floor(latest))
+        if self.store is None:
+            return
+        try:
+            self.store.write(self.frame, compacted)
+            self.store.remove(dropped)
+        except OSError:
+            pass
+
+    def _query(self):
+        ref = self.db.collection(self.collection)
+        if self.watermark is None:
+            # 첫 조회는 보존 기간 안의 문서만 (투숙일 조건은 collected_at 범위 조건과 함께 걸 수 없어 적재 후 처리)
+            floor = self.retention.query_floor(self._latest_watermark()) if self.retention is not None else None
+            query = ref if floor is None else ref.where(WATERMARK_FIELD, ">=", floor)
+        else:
+            # 같은 시각에 뒤늦게 들어온 문서를 놓치지 않도록 '>=' 로 조회 후 id 로 중복 제거
+            query = ref.where(WATERMARK_FIELD, ">=", self.watermark)
+        return query.select(SOURCE_FIELDS)
+
+    def _latest_watermark(self):
+        """가장 최근 문서의 collected_at (보존 하한 기준일 + 실제 저장 타입 확인용, 없으면 None)"""
+        ref = self.db.collection(self.collection)
+        for doc in ref.order_by(WATERMARK_FIELD, direction=DESCENDING).select([WATERMARK_FIELD]).limit(1).stream():
+            return doc.to_dict().get(WATERMARK_FIELD)
+        return None
+
+    def _advance_watermark(self, latest, latest_ids):
+        """이번 갱신에서 본 최신 collected_at 과 그 시각의 문서 id 로 워터마크 이동"""
+        if latest is None:
+            return
+        if self.watermark is not None and latest <= self.watermark:
+            if latest == self.watermark:
+                self._edge_ids.update(latest_ids)
+            return
+        self.watermark = latest
+        self._edge_ids = set(latest_ids)
+
+    def _chunk_frame(self, columns, ids):
+        chunk = pd.DataFrame(columns)
+        chunk['doc_id'] = ids
+        return chunk
+
+    def pull(self):
+        """워터마크 이후 신규 문서를 chunk_size 행 단위 원본 DataFrame 으로 차례로 반환 (통계는 last_pull)"""
+        self.last_pull = {'문서수': 0, '바이트': 0, '청크수': 0}
+        columns = {name: [] for name in SOURCE_FIELDS}
+        ids = []
+        for doc in self._query().stream():
+            self.docs_read += 1
+            self.last_pull['문서수'] += 1
+            if doc.id in self._edge_ids:
+                continue
+            row = doc.to_dict()
+            for name, values in columns.items():
+                values.append(row.get(name))
+            ids.append(doc.id)
+            if len(ids) >= self.chunk_size:
+                yield self._chunk_frame(columns, ids)
+                columns = {name: [] for name in SOURCE_FIELDS}
+                ids = []
+        if ids:
+            yield self._chunk_frame(columns, ids)
+
+    def append(self, new_frame):
+        if new_frame.empty:
+            return
+        self.frame = concat_prices([self.frame, new_frame])
+
+    def refresh(self):
+        """신규 문서를 정제해 스냅샷 뒤에 붙이고 전체 스냅샷을 반환"""
+        with self._lock:
+            if not self._seeded:
+                self._seed_from_store()
+                self._seeded = True
+                if self.outliers is not None:
+                    self.outliers.seed(self.frame)
+                self._apply_retention()
+            t0 = time.perf_counter()
+            cleaned, reports = [], []
+            latest, latest_ids = None, []
+            for chunk in self.pull():
+                # 원본 청크는 정제 직후 버리고 정제된(카테고리/숫자형) 청크만 보관
+                self.last_pull['청크수'] += 1
+                self.last_pull['바이트'] += int(chunk.memory_usage(deep=True).sum())
+                stamps = chunk[WATERMARK_FIELD].dropna()
+                if not stamps.empty:
+                    chunk_latest = stamps.max()
+                    chunk_ids = chunk.loc[stamps.index[stamps == chunk_latest], 'doc_id'].tolist()
+                    if latest is None or chunk_latest > latest:
+                        latest, latest_ids = chunk_latest, chunk_ids
+                    elif chunk_latest == latest:
+                        latest_ids += chunk_ids
+                report = []
+                cleaned.append(self.transform(chunk, report))
+                reports.append(report)
+            if isinstance(latest, pd.Timestamp):
+                latest = latest.to_pydatetime()
+            self.last_pull['소요시간(ms)'] = round((time.perf_counter() - t0) * 1000, 2)
+            if cleaned:
+                new_frame = concat_prices(cleaned)
+                self.last_report = merge_step_reports(reports)
+                if self.outliers is not None:
+                    flagged_before, released_before = self.outliers.flagged_total, self.outliers.released_total
+                    new_frame = self.outliers.split(new_frame)
+                    self.last_pull['이상치'] = self.outliers.flagged_total - flagged_before
+                    self.last_pull['복원'] = self.outliers.released_total - released_before
+                self.last_pull['신규행'] = len(new_frame)
+                self.append(new_frame)
+                self.rollups.update(new_frame)
+                self._advance_watermark(latest, latest_ids)
+                self._persist(new_frame)
+                self._apply_retention()
+            return self.frame
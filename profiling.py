@@ -0,0 +1,61 @@
+# ------------------------------------------------------------------
+# 대시보드 성능 계측 (옵트인)
+# - AMBER_PROFILE=1 환경변수 또는 사이드바 토글로 활성화
+# - 구간별 소요시간/행수/피크 메모리(tracemalloc)를 기록하고 JSONL 로 누적 저장
+# - 비활성 시 section() 은 아무것도 측정하지 않음 (tracemalloc 오버헤드 없음)
+# - tracemalloc 은 프로세스 전체 설정이라 환경변수 모드에서만 켜고 절대 끄지 않음
+#   (사이드바 토글 세션은 시간만 측정, 메모리는 None -> 다른 세션/워커 스레드에 영향 없음)
+# ------------------------------------------------------------------
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_ENABLED = os.environ.get("AMBER_PROFILE", "") not in ("", "0", "false", "False")
+PROFILE_LOG = os.environ.get("AMBER_PROFILE_LOG", "profile_log.jsonl")
+
+MB = 1024 ** 2
+
+
+class Profiler:
+    def __init__(self, enabled=PROFILE_ENABLED, trace_memory=PROFILE_ENABLED):
+        self.enabled = enabled
+        # tracemalloc 은 파이썬 할당을 수 배 느리게 하므로 요청한 경우에만 켬
+        self.trace_memory = enabled and trace_memory
+        self.records = []
+        self._t_start = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def section(self, name):
+        """구간 계측 - yield 된 dict 에 '행수' 등 추가 지표를 넣을 수 있음 (중첩 사용 금지)"""
+        record = {'구간': name}
+        if not self.enabled:
+            yield record
+            return
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['소요시간(ms)'] = round((time.perf_counter() - t0) * 1000, 2)
+            record['피크메모리(MB)'] = round((tracemalloc.get_traced_memory()[1] - base) / MB, 2) if self.trace_memory else None
+            self.records.append(record)
+
+    def summary(self, **extra):
+        return {
+            '시각': datetime.now().isoformat(timespec='seconds'),
+            '전체(ms)': round((time.perf_counter() - self._t_start) * 1000, 2),
+            '구간': self.records,
+            **extra,
+        }
+
+    def write_jsonl(self, path=PROFILE_LOG, **extra):
+        """이번 실행의 계측 결과를 JSONL 한 줄로 추가 (회귀 추적용)"""
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.summary(**extra), ensure_ascii=False, default=str) + "\n")
@@ -0,0 +1,92 @@
+# ------------------------------------------------------------------
+# 적재 시 보존 정책 (스크래퍼가 계속 돌아도 메모리/차트 비용이 일정하게 유지되도록)
+# - 최근 RECENT_DAYS 수집일과 아직 지나지 않은 투숙일은 원본 해상도 유지
+# - 그보다 오래된 지난 투숙일 수집분은 (호텔/판매처/객실/투숙일/수집일/리드타임)별
+#   일 단위 최저가/최고가/평균가/표준편차/건수 한 행으로 축약 -> 최저가 rollup/추이 차트 결과는 그대로,
+#   KPI/땡처리 평균·표준편차는 건수 가중, 파리티 기준가는 최고가로 계산 (analytics)
+# - MAX_DAYS 보다 오래된 수집일은 버리고, 첫 조회 시 Firestore 쿼리 조건으로도 걸러 읽지 않음
+# - 기준일은 데이터의 최신 수집일 (첫 조회 하한도 최신 문서 기준 -> 스크래퍼가 멈춰도 화면이 비지 않음)
+# ------------------------------------------------------------------
+import os
+from dataclasses import dataclass
+from datetime import datetime
+
+import pandas as pd
+
+from normalize import LOCAL_TZ, STAY_DATE_FORMAT, add_room_codes, concat_prices
+
+RETENTION_RECENT_DAYS = int(os.environ.get("AMBER_RETENTION_RECENT_DAYS", "14"))
+# 0 이면 무기한 보관 (축약만 수행)
+RETENTION_MAX_DAYS = int(os.environ.get("AMBER_RETENTION_MAX_DAYS", "180"))
+
+# 축약 행 그룹 키 - rollup 키(LEAD_TIME_KEYS/COLLECTION_KEYS)를 모두 포함해야 최저가 집계가 달라지지 않음
+DOWNSAMPLE_KEYS = ['호텔명', '판매처', '객실타입', '날짜', '수집일', '리드타임']
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    recent_days: int = RETENTION_RECENT_DAYS
+    max_days: int = RETENTION_MAX_DAYS
+
+    def query_floor(self, latest):
+        """첫 Firestore 조회의 collected_at 하한 (latest: 가장 최근 문서의 collected_at)
+        - drop_floor 와 같이 최신 수집일 기준 -> 오래 멈췄던 스크래퍼 데이터도 보존 기간만큼 읽음
+        - Firestore 는 타입이 다르면 비교 조건에 걸리지 않으므로(빈 결과) latest 와 같은 타입으로 반환
+        - 문자열이면 'YYYY-MM-DD' ('YYYY-MM-DD HH:MM:SS' 와 사전순 비교), Timestamp 면 한국 시각 0시를 같은 tz 로
+        - 타입을 모르면(문서 없음/기타) None -> 하한 없이 전체 조회 후 적재 단계에서만 보존 정책 적용"""
+        if not self.max_days:
+            return None
+        if isinstance(latest, str):
+            return self.drop_floor(latest[:10])
+        if isinstance(latest, datetime):
+            stamp = pd.Timestamp(latest)
+            if stamp.tzinfo is None:
+                return pd.Timestamp(self.drop_floor(stamp.normalize())).to_pydatetime()
+            # 수집일은 한국 시각 기준 날짜 (normalize 의 tz 변환과 동일)
+            day = stamp.tz_convert(LOCAL_TZ).tz_localize(None).normalize()
+            return pd.Timestamp(self.drop_floor(day), tz=LOCAL_TZ).tz_convert(stamp.tzinfo).to_pydatetime()
+        return None
+
+    def drop_floor(self, latest):
+        """이 수집일 미만은 삭제 (latest: 최신 수집일)"""
+        return (pd.Timestamp(latest) - pd.Timedelta(days=self.max_days)).strftime(STAY_DATE_FORMAT)
+
+    def apply(self, frame):
+        """(보존 적용 프레임, 축약된 수집일 목록, 삭제된 수집일 목록) 반환 - 바뀐 게 없으면 프레임 그대로"""
+        if frame.empty:
+            return frame, [], []
+        collected = frame['수집일'].astype(object)
+        latest = pd.Timestamp(collected.max())
+        recent_floor = (latest - pd.Timedelta(days=self.recent_days - 1)).strftime(STAY_DATE_FORMAT)
+
+        none = pd.Series(False, index=frame.index)
+        dropped = collected < self.drop_floor(latest) if self.max_days else none
+        # 이미 축약된 행은 다시 묶지 않음 (평균가를 다시 평균내지 않도록)
+        downsampled = frame['집계건수'].notna() if '집계건수' in frame.columns else none
+        old = ~dropped & (collected < recent_floor) & (frame['투숙일_dt'] < latest.normalize()) & ~downsampled
+        if not dropped.any() and not old.any():
+            return frame, [], []
+
+        daily = self._downsample(frame[old])
+        out = concat_prices([daily, frame[~dropped & ~old]])
+        out = out[list(frame.columns) + [c for c in out.columns if c not in frame.columns]]
+        return out, sorted(set(collected[old])), sorted(set(collected[dropped]))
+
+    @staticmethod
+    def _downsample(old):
+        if old.empty:
+            return old
+        daily = (old.groupby(DOWNSAMPLE_KEYS, observed=True, sort=False, dropna=False)
+                 .agg(가격=('가격', 'min'), 최고가=('가격', 'max'), 평균가=('가격', 'mean'), 표준편차=('가격', 'std'),
+                      집계건수=('가격', 'size'), 수집시간=('수집시간', 'last'), 수집시간_dt=('수집시간_dt', 'max'),
+                      투숙일_dt=('투숙일_dt', 'first'))
+                 .reset_index())
+        # 건수 가중 분산을 그대로 복원할 수 있도록 모표준편차(ddof=0)로 보관 (1건이면 0)
+        count = daily['집계건수']
+        daily['표준편차'] = (daily['표준편차'] * ((count - 1) / count) ** 0.5).fillna(0)
+        # 원본 행에는 값이 없는(NaN) 컬럼이라 메모리를 아끼도록 float32
+        stats = ['최고가', '평균가', '표준편차', '집계건수']
+        daily[stats] = daily[stats].astype('float32')
+        # 축약 행은 원본 문서가 아니므로 doc_id 없음
+        daily['doc_id'] = None
+        return add_room_codes(daily)
@@ -0,0 +1,56 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+from analytics import PriceRollups
+from normalize import normalize_prices
+
+HOTELS = ["엠버 퓨어힐", "그랜드하얏트", "파르나스"]
+ROOMS = ["그린밸리 디럭스 더블", "디럭스 더블", "디럭스 트윈"]
+CHANNELS = ["아고다", "트립닷컴", "야놀자"]
+
+
+def _prices(n, start, days, seed=0):
+    rng = np.random.default_rng(seed)
+    hotel = rng.integers(0, len(HOTELS), n)
+    collected = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days * 86400, n), unit='s')
+    stay = collected.normalize() + pd.to_timedelta(rng.integers(0, 20, n), unit='D')
+    return normalize_prices(pd.DataFrame({
+        'hotel_name': np.array(HOTELS, dtype=object)[hotel],
+        'target_date': stay.strftime('%Y-%m-%d'),
+        'room_name': np.array(ROOMS, dtype=object)[hotel],
+        'channel': np.array(CHANNELS, dtype=object)[rng.integers(0, len(CHANNELS), n)],
+        'price': rng.integers(100, 300, n) * 1000,
+        'collected_at': collected.strftime('%Y-%m-%d %H:%M:%S'),
+    }))
+
+
+def _sorted(frame):
+    keys = [c for c in frame.columns if c != '가격']
+    return frame.astype({k: object for k in keys}).sort_values(keys).reset_index(drop=True)
+
+
+def test_incremental_rollup_matches_full_build():
+    history = _prices(3000, '2024-01-01', 10)
+    # 마지막 수집일(01-10) 파티션에 합쳐지는 행과 새 수집일(01-11) 행이 섞인 증분
+    increment = _prices(300, '2024-01-10', 2, seed=1)
+    incremental = PriceRollups()
+    incremental.update(history)
+    incremental.update(increment)
+    full = PriceRollups()
+    full.update(pd.concat([history, increment], ignore_index=True))
+    pd.testing.assert_frame_equal(_sorted(incremental.lead_time), _sorted(full.lead_time))
+    pd.testing.assert_frame_equal(_sorted(incremental.collection), _sorted(full.collection))
+
+
+def test_shallow_copy_keeps_rollups_at_copy_time():
+    rollups = PriceRollups()
+    rollups.update(_prices(1000, '2024-01-01', 5))
+    snapshot = copy.copy(rollups)
+    before = len(snapshot.collection)
+    rollups.update(_prices(100, '2024-01-06', 1, seed=1))
+    rollups.prune('2024-01-03')
+    # 워커 스냅샷(얕은 복사)은 이후 갱신/삭제의 영향을 받지 않음
+    assert len(snapshot.collection) == before
+    assert sorted(set(rollups.collection['수집일'])) == ['2024-01-03', '2024-01-04', '2024-01-05', '2024-01-06']
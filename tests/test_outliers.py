@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from normalize import PRICE_CAP
+from outliers import OutlierFilter
+
+
+def _rows(prices, stay_date="2024-05-08"):
+    n = len(prices)
+    return pd.DataFrame({
+        '호텔명': pd.Categorical(["그랜드하얏트"] * n),
+        '객실타입': pd.Categorical(["디럭스 더블"] * n),
+        '판매처': pd.Categorical(["아고다"] * n),
+        '가격': np.asarray(prices, dtype=float),
+        '투숙일_dt': pd.to_datetime([stay_date] * n),
+    })
+
+
+def test_hard_failures_are_excluded_and_audited():
+    flt = OutlierFilter()
+    clean = flt.split(_rows([200000, 0, PRICE_CAP * 2, 201000]))
+    assert sorted(clean['가격']) == [200000, 201000]
+    assert sorted(flt.audit['사유']) == ['0원 이하', '상한 초과']
+
+
+def test_batch_of_only_hard_failures_on_fresh_filter():
+    flt = OutlierFilter()
+    clean = flt.split(_rows([0]))
+    assert clean.empty
+    assert list(flt.audit['사유']) == ['0원 이하']
+    # 이후 정상 행도 그대로 판정
+    assert len(flt.split(_rows([200000, 201000]))) == 2
+
+
+def test_single_spike_is_held_out_of_aggregates():
+    rng = np.random.default_rng(0)
+    flt = OutlierFilter()
+    flt.split(_rows(rng.normal(200000, 3000, 60).round(-3)))
+    clean = flt.split(_rows([1400000]))
+    assert clean.empty
+    assert list(flt.audit['사유']) == ['중앙값 이탈']
+
+
+def test_held_rows_beyond_audit_size_move_to_rejected():
+    rng = np.random.default_rng(0)
+    flt = OutlierFilter(audit_size=3)
+    flt.split(_rows(rng.normal(200000, 3000, 60).round(-3)))
+    for price in (1000000, 1100000, 1200000, 1300000, 1400000):
+        flt.split(_rows([price]))
+    # 가장 오래된 보류 행 2건은 버려지지 않고 '보류 만료' 로 감사 테이블에 남음
+    assert list(flt.pending['가격']) == [1200000, 1300000, 1400000]
+    assert list(flt.rejected['사유']) == ['보류 만료', '보류 만료']
+    assert list(flt.rejected['가격']) == [1000000, 1100000]
+    assert len(flt.audit) == 5
+
+
+def test_price_level_shift_is_accepted_and_held_rows_are_restored():
+    rng = np.random.default_rng(0)
+    flt = OutlierFilter()
+    flt.split(_rows(rng.normal(200000, 3000, 60).round(-3)))
+
+    kept = 0
+    for _ in range(30):
+        kept += len(flt.split(_rows(rng.normal(330000, 3000, 4).round(-3))))
+    # 성수기 가격(33만원대)은 처음엔 보류되더라도 창의 중앙값이 따라오면 전부 집계로 돌아옴
+    assert kept == 120
+    assert flt.pending.empty
+    assert abs(flt.history['가격'].median() - 330000) < 10000
+    assert flt.released_total > 0
+
+
+def test_weekend_rates_are_scored_separately():
+    rng = np.random.default_rng(0)
+    flt = OutlierFilter()
+    flt.split(_rows(rng.normal(200000, 3000, 60).round(-3), stay_date="2024-05-08"))  # 수요일
+    # 토요일 투숙 요금은 평일 창과 비교하지 않음
+    clean = flt.split(_rows(rng.normal(320000, 3000, 10).round(-3), stay_date="2024-05-11"))
+    assert len(clean) == 10
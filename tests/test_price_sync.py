@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from fake_firestore import InMemoryFirestore
+from normalize import normalize_prices
+from price_store import PriceStore
+from price_sync import PriceSync
+from retention import RetentionPolicy
+
+FIELDS = ['hotel_name', 'target_date', 'room_name', 'channel', 'price', 'collected_at']
+
+
+def _docs(*rows):
+    return pd.DataFrame([dict(zip(FIELDS, row)) for row in rows], columns=FIELDS)
+
+
+def _fixture():
+    db = InMemoryFirestore(FIELDS)
+    db.add(_docs(
+        ("그랜드하얏트", "2024-05-10", "디럭스 더블", "아고다", 200000, "2024-05-01 09:00:00"),
+        ("엠버 퓨어힐", "2024-05-10", "그린밸리 디럭스 더블", "아고다", 180000, "2024-05-01 10:00:00"),
+    ))
+    return db
+
+
+def test_document_tied_with_watermark_is_read_once():
+    db = _fixture()
+    sync = PriceSync(db, normalize_prices)
+    assert len(sync.refresh()) == 2
+    assert sync.watermark == "2024-05-01 10:00:00"
+
+    # 워터마크와 같은 collected_at 으로 뒤늦게 들어온 문서는 읽고, 이미 본 문서는 다시 붙이지 않음
+    db.add(_docs(("파르나스", "2024-05-10", "디럭스 트윈", "야놀자", 210000, "2024-05-01 10:00:00")))
+    frame = sync.refresh()
+    assert len(frame) == 3
+    assert frame['doc_id'].is_unique
+    assert sync.last_pull['신규행'] == 1
+
+
+def test_refresh_without_new_documents_keeps_frame():
+    db = _fixture()
+    sync = PriceSync(db, normalize_prices)
+    first = sync.refresh()
+    frame = sync.refresh()
+    assert len(frame) == len(first)
+    assert frame['doc_id'].is_unique
+    assert '신규행' not in sync.last_pull
+    assert sync.watermark == "2024-05-01 10:00:00"
+
+
+def test_restart_from_store_reads_only_missing_documents(tmp_path):
+    db = _fixture()
+    PriceSync(db, normalize_prices, store=PriceStore(str(tmp_path))).refresh()
+    db.add(_docs(("신라호텔", "2024-05-11", "스위트", "트립닷컴", 250000, "2024-05-02 08:00:00")))
+
+    restarted = PriceSync(db, normalize_prices, store=PriceStore(str(tmp_path)))
+    frame = restarted.refresh()
+    assert sorted(frame['doc_id']) == sorted(db.ids)
+    # 저장소에 있던 마지막 수집일(05-01) 문서는 id 로 건너뛰고 신규 1건만 정제
+    assert restarted.last_pull['신규행'] == 1
+    assert restarted.watermark == "2024-05-02 08:00:00"
+
+
+
+def test_restart_from_store_with_timestamp_collected_at(tmp_path):
+    # Firestore Timestamp(UTC) - 수집일은 한국 시각 기준이므로 재시작 하한도 한국 시각 0시여야 함
+    kst = [pd.Timestamp(f"2024-05-01 {hour}:00", tz="Asia/Seoul").tz_convert("UTC") for hour in ("05", "07", "12")]
+    db = InMemoryFirestore(FIELDS)
+    db.add(_docs(("그랜드하얏트", "2024-05-10", "디럭스 더블", "아고다", 200000, kst[0])))
+    PriceSync(db, normalize_prices, store=PriceStore(str(tmp_path))).refresh()
+    db.add(_docs(
+        ("파르나스", "2024-05-10", "디럭스 트윈", "야놀자", 210000, kst[1]),
+        ("신라호텔", "2024-05-11", "스위트", "트립닷컴", 250000, kst[2]),
+    ))
+
+    restarted = PriceSync(db, normalize_prices, store=PriceStore(str(tmp_path)))
+    frame = restarted.refresh()
+    assert sorted(frame['doc_id']) == sorted(db.ids)
+    assert restarted.last_pull['신규행'] == 2
+
+def _recent_docs(collected_at):
+    return _docs(
+        ("그랜드하얏트", "2099-01-01", "디럭스 더블", "아고다", 200000, collected_at[0]),
+        ("파르나스", "2099-01-01", "디럭스 트윈", "야놀자", 210000, collected_at[1]),
+    )
+
+
+def test_retention_floor_matches_string_collected_at():
+    now = datetime.now()
+    stamps = [(now - timedelta(days=d)).strftime('%Y-%m-%d %H:%M:%S') for d in (400, 1)]
+    db = InMemoryFirestore(FIELDS)
+    db.add(_recent_docs(stamps))
+    frame = PriceSync(db, normalize_prices, retention=RetentionPolicy(recent_days=14, max_days=180)).refresh()
+    # 보존 기간(180일) 밖 문서는 쿼리 단계에서 제외
+    assert list(frame['doc_id']) == [db.ids[1]]
+
+
+def test_retention_floor_matches_timestamp_collected_at():
+    now = pd.Timestamp.now(tz='UTC').floor('s')
+    db = InMemoryFirestore(FIELDS)
+    db.add(_recent_docs([now - pd.Timedelta(days=400), now - pd.Timedelta(days=1)]))
+    # Timestamp 필드에 문자열 하한을 걸면 아무 문서도 걸리지 않으므로 같은 타입의 하한이어야 함
+    frame = PriceSync(db, normalize_prices, retention=RetentionPolicy(recent_days=14, max_days=180)).refresh()
+    assert list(frame['doc_id']) == [db.ids[1]]
+
+
+def test_retention_floor_counts_from_latest_document_when_scraper_stopped():
+    db = InMemoryFirestore(FIELDS)
+    db.add(_docs(
+        ("그랜드하얏트", "2022-06-10", "디럭스 더블", "아고다", 200000, "2022-06-01 09:00:00"),
+        ("그랜드하얏트", "2023-06-10", "디럭스 더블", "아고다", 200000, "2023-05-01 09:00:00"),
+        ("파르나스", "2023-06-10", "디럭스 트윈", "야놀자", 210000, "2023-06-01 09:00:00"),
+    ))
+    # 마지막 수집이 1년 이상 전이어도 그 시점 기준 180일 안의 문서는 읽음
+    frame = PriceSync(db, normalize_prices, retention=RetentionPolicy(recent_days=14, max_days=180)).refresh()
+    assert sorted(frame['doc_id']) == db.ids[1:]
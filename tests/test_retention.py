@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from analytics import PriceRollups, collection_trends, compute_kpis, detect_dumping, find_parity_breaks, lead_time_trend
+from normalize import normalize_prices
+from retention import RetentionPolicy
+
+FIELDS = ['hotel_name', 'target_date', 'room_name', 'channel', 'price', 'collected_at']
+# 호텔별 (오전 수집가, 오후 수집가) - 하루 두 번 수집
+DAILY_PRICES = {
+    ('엠버 퓨어힐', '그린밸리 디럭스 더블'): (100000, 300000),
+    ('그랜드하얏트', '디럭스 더블'): (200000, 220000),
+}
+
+
+def _two_scrapes_a_day(days=30, stay_date='2024-03-20'):
+    rows = []
+    for d in range(days):
+        day = pd.Timestamp('2024-03-01') + pd.Timedelta(days=d)
+        for (hotel, room), prices in DAILY_PRICES.items():
+            for hour, price in zip((9, 21), prices):
+                stamp = (day + pd.Timedelta(hours=hour)).strftime('%Y-%m-%d %H:%M:%S')
+                rows.append((hotel, stay_date, room, '아고다', price, stamp))
+    return normalize_prices(pd.DataFrame(rows, columns=FIELDS))
+
+
+def _compacted(frame, max_days=0):
+    # 마지막 수집일(03-30) 기준 최근 7일 이전, 지난 투숙일(03-20) 수집분을 축약
+    out, compacted, _ = RetentionPolicy(recent_days=7, max_days=max_days).apply(frame)
+    assert compacted and len(out) < len(frame)
+    return out
+
+
+def test_compaction_keeps_kpis_and_parity():
+    frame = _two_scrapes_a_day()
+    out = _compacted(frame)
+    before, after = compute_kpis(frame), compute_kpis(out)
+    for key in ('amber_avg', 'market_avg', 'mpi', 'major_avg', 'all_avg', 'price_gap', 'amber_std', 'stability'):
+        assert after[key] == pytest.approx(before[key])
+    for key in ('amber_min', 'comp_min', 'all_min', 'top_channel'):
+        assert after[key] == before[key]
+    # 파리티 기준가는 축약 행에서도 그날 최고가
+    assert set(find_parity_breaks(out[out['엠버여부']])['기준가']) == {300000}
+
+
+def test_compaction_keeps_min_trends():
+    frame = _two_scrapes_a_day()
+    out = _compacted(frame)
+    trends = []
+    for data in (frame, out):
+        rollups = PriceRollups()
+        rollups.update(data)
+        trends.append((lead_time_trend(rollups.lead_time), collection_trends(rollups.collection)['2024-03-20']))
+    pd.testing.assert_frame_equal(trends[0][0], trends[1][0])
+    pd.testing.assert_frame_equal(trends[0][1], trends[1][1])
+
+
+def test_compaction_keeps_dumping_means():
+    frame = _two_scrapes_a_day()
+    out = _compacted(frame)
+    before = detect_dumping(frame, drop=-1).set_index('호텔명')
+    after = detect_dumping(out, drop=-1).set_index('호텔명')
+    pd.testing.assert_series_equal(before['사전평균'], after['사전평균'], check_dtype=False)
+
+
+def test_dropped_collection_days_leave_lead_time_rollup():
+    frame = _two_scrapes_a_day()
+    rollups = PriceRollups()
+    rollups.update(frame)
+    policy = RetentionPolicy(recent_days=7, max_days=10)
+    out, _, dropped = policy.apply(frame)
+    rollups.prune(policy.drop_floor(frame['수집일'].max()))
+    assert dropped
+    # 투숙일이 남아 있어도 삭제된 수집일의 리드타임 집계는 원본 프레임과 함께 빠짐
+    assert set(rollups.lead_time['수집일']) == set(out['수집일'])
+    assert set(rollups.collection['수집일']) == set(out['수집일'])
+
+
+def test_query_floor_counts_from_latest_document():
+    policy = RetentionPolicy(recent_days=14, max_days=180)
+    # drop_floor 와 같은 기준일 -> 스크래퍼가 오래 멈췄어도 마지막 수집분부터 보존 기간만큼 읽음
+    assert policy.query_floor("2023-06-01 10:00:00") == policy.drop_floor("2023-06-01") == "2022-12-03"
+    # Timestamp 는 한국 시각 수집일 0시 (UTC 16시 = 다음날 01시 KST)
+    floor = policy.query_floor(datetime(2023, 6, 1, 16, 0, tzinfo=timezone.utc))
+    assert floor == pd.Timestamp("2022-12-04", tz="Asia/Seoul").to_pydatetime()
+    assert floor.tzinfo is not None
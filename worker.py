@@ -0,0 +1,181 @@
+# ------------------------------------------------------------------
+# 백그라운드 사전 계산 워커
+# - 주기적으로 Firestore 증분 동기화 -> 기본 필터 리포트(KPI/파리티/매트릭스) 계산
+#   -> 스냅샷을 메모리에 교체 (별도 프로세스 워커일 때만 파일로 원자적 저장)
+# - 대시보드 세션은 스냅샷만 읽으므로 동시 접속자가 늘어도 Firestore 조회/집계는 1회
+# - Streamlit 프로세스 안의 스레드로 돌리거나, 별도 프로세스로 실행:
+#     python worker.py        (AMBER_EXTERNAL_WORKER=1 로 대시보드 쪽 스레드는 끔)
+# ------------------------------------------------------------------
+import copy
+import json
+import logging
+import os
+import pickle
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import pandas as pd
+
+from engine import build_report, create_sync, data_version, default_selection, get_report, load
+from price_store import PriceStore
+
+SNAPSHOT_PATH = os.environ.get("AMBER_SNAPSHOT_PATH", os.path.join(".price_store", "snapshot.pkl"))
+PRECOMPUTE_INTERVAL = float(os.environ.get("PRECOMPUTE_INTERVAL", "5"))
+EXTERNAL_WORKER = os.environ.get("AMBER_EXTERNAL_WORKER", "") not in ("", "0", "false", "False")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Snapshot:
+    version: tuple
+    generated_at: datetime
+    df: pd.DataFrame
+    rollups: object
+    # 기본 필터(대시보드 첫 화면) 리포트 - 데이터가 없으면 None
+    report: object = None
+    # 동기화 통계 (계측 패널용)
+    sync_stats: dict = field(default_factory=dict)
+    # 현재 집계에서 제외된 이상치 행 (확정 오류 + 복원 대기 보류 행, 사유/점수 포함)
+    outlier_audit: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+
+class SnapshotStore:
+    """스냅샷 저장/읽기 - 같은 프로세스에서 쓴 스냅샷은 메모리에서, 아니면 mtime 이 바뀔 때만 파일을 다시 읽음
+    (persist=False 면 파일을 쓰지도 읽지도 않음 -> 프로세스 내 워커 모드에서 매 갱신 수십 MB 피클 방지)"""
+
+    def __init__(self, path=SNAPSHOT_PATH, persist=True):
+        self.path = path
+        self.persist = persist
+        self._cached = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def write(self, snapshot):
+        with self._lock:
+            self._cached = snapshot
+            if not self.persist:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                # 디스크에 못 써도 같은 프로세스 세션은 메모리 스냅샷으로 계속 동작
+                logger.exception("snapshot write failed")
+            # 방금 쓴(또는 이전에 남아 있던) 파일을 다시 읽지 않도록 mtime 기록
+            try:
+                self._mtime = os.path.getmtime(self.path)
+            except OSError:
+                self._mtime = None
+
+    def read(self):
+        if not self.persist:
+            return self._cached
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return self._cached
+        with self._lock:
+            if mtime != self._mtime:
+                with open(self.path, 'rb') as f:
+                    self._cached = pickle.load(f)
+                self._mtime = mtime
+            return self._cached
+
+
+class PrecomputeWorker:
+    def __init__(self, sync, store, interval=PRECOMPUTE_INTERVAL):
+        self.sync = sync
+        self.store = store
+        self.interval = interval
+        self._last_state = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        """동기화 후 데이터가 바뀌었으면 새 스냅샷을 저장 (바뀐 게 없으면 None)"""
+        df = load(self.sync)
+        version = data_version(df)
+        outliers = self.sync.outliers
+        # 이상치만 새로 들어온 경우도 감사 테이블이 갱신되도록 판정/복원 누계를 상태에 포함
+        state = (version, (outliers.flagged_total, outliers.released_total) if outliers is not None else None)
+        if state == self._last_state:
+            return None
+        snapshot = Snapshot(
+            version=version,
+            generated_at=datetime.now(),
+            df=df,
+            # 동기화가 테이블을 교체(재할당)하므로 얕은 복사로 이 시점 집계를 고정
+            rollups=copy.copy(self.sync.rollups),
+            report=build_report(df, default_selection(df)) if not df.empty else None,
+            sync_stats={'누적 문서수': self.sync.docs_read, '마지막 조회': dict(self.sync.last_pull),
+                        '정제 단계': list(self.sync.last_report)},
+            outlier_audit=outliers.audit if outliers is not None else pd.DataFrame(),
+        )
+        self.store.write(snapshot)
+        self._last_state = state
+        logger.info("snapshot written: %s rows", f"{len(df):,}")
+        return snapshot
+
+    def run_forever(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                # 일시적 Firestore/디스크 오류는 다음 주기에 재시도
+                logger.exception("precompute failed")
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self):
+        """첫 스냅샷은 바로 만들고 이후는 백그라운드 스레드에서 주기 갱신"""
+        try:
+            self.run_once()
+        except Exception:
+            logger.exception("initial precompute failed")
+        self._thread = threading.Thread(target=self._wait_then_run, name="precompute-worker", daemon=True)
+        self._thread.start()
+        return self
+
+    def _wait_then_run(self):
+        if not self._stop.wait(self.interval):
+            self.run_forever()
+
+    def stop(self):
+        self._stop.set()
+
+
+def report_for(snapshot, selection):
+    """기본 필터면 미리 계산된 리포트를, 아니면 엔진 캐시로 계산한 리포트를 반환"""
+    if snapshot.report is not None and snapshot.report.selection.key(snapshot.version) == selection.key(snapshot.version):
+        return snapshot.report
+    return get_report(snapshot.df, selection)
+
+
+def _init_firestore():
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    if not firebase_admin._apps:
+        # FIREBASE_SERVICE_ACCOUNT(JSON 문자열)가 없으면 GOOGLE_APPLICATION_CREDENTIALS 기본 인증 사용
+        key_json = os.environ.get("FIREBASE_SERVICE_ACCOUNT")
+        cred = credentials.Certificate(json.loads(key_json)) if key_json else None
+        firebase_admin.initialize_app(cred)
+    return firestore.client()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    worker = PrecomputeWorker(create_sync(_init_firestore(), store=PriceStore()), SnapshotStore())
+    logger.info("precompute worker started (interval=%ss, snapshot=%s)", worker.interval, worker.store.path)
+    worker.run_forever()
+
+
+if __name__ == "__main__":
+    # __main__ 이 아닌 worker 모듈 이름으로 클래스를 피클해야 대시보드가 스냅샷을 읽을 수 있음
+    import worker
+    worker.main()